@@ -0,0 +1,194 @@
+"""Per-route admission control and load shedding.
+
+Each governed route has a concurrency limit and a bounded wait queue. All
+governed routes also share one global limit. Lower priorities are held back
+from the top of that limit, so order submission always has room. A request
+that cannot be served before its deadline is rejected with 503 and a
+``Retry-After`` header straight away, instead of waiting to time out.
+The deadline is the route's ``max_wait``, or a shorter
+``X-Request-Timeout-Ms`` sent by the client.
+"""
+import asyncio
+import json
+import math
+import time
+from collections import deque
+
+PRIORITIES = {"high": 0, "normal": 1, "low": 2}
+
+
+class RouteLimit:
+    def __init__(self, name, concurrency, queue, max_wait, priority="normal"):
+        self.name = name
+        self.concurrency = concurrency
+        self.queue = queue
+        self.max_wait = max_wait
+        self.priority = PRIORITIES[priority]
+        self.active = 0
+        self.waiters = deque()
+        self.service_time = 0.05
+        self.admitted = 0
+        self.rejected = 0
+
+    def estimated_wait(self):
+        """Rough time until a newly queued request would start."""
+        rounds = math.ceil((len(self.waiters) + 1) / self.concurrency)
+        return rounds * self.service_time
+
+    def stats(self):
+        return {
+            "route": self.name,
+            "priority": next(k for k, v in PRIORITIES.items() if v == self.priority),
+            "concurrency": self.concurrency,
+            "active": self.active,
+            "queued": len(self.waiters),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "service_time_ms": round(self.service_time * 1000, 2),
+        }
+
+
+class Rejected(Exception):
+    def __init__(self, retry_after):
+        super().__init__("Server busy")
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+class AdmissionController:
+    def __init__(self, global_limit=128, reserved=32, default=None):
+        self.global_limit = global_limit
+        self.reserved = reserved
+        self.default = default
+        self.routes = {}
+        self.active = 0
+
+    def limit(self, method, path, concurrency, queue, max_wait, priority="normal"):
+        self.routes[(method, path)] = RouteLimit(f"{method} {path}", concurrency, queue, max_wait, priority)
+
+    def route_for(self, method, path):
+        return self.routes.get((method, path), self.default if path.startswith("/api/") else None)
+
+    def _all_routes(self):
+        return list(self.routes.values()) + ([self.default] if self.default else [])
+
+    def _can_admit(self, route):
+        # Each step down in priority leaves another `reserved` slots for the tiers above it
+        headroom = self.global_limit - self.reserved * route.priority
+        return route.active < route.concurrency and self.active < headroom
+
+    def _admit(self, route):
+        route.active += 1
+        route.admitted += 1
+        self.active += 1
+
+    def _drain(self):
+        """Hand free slots to waiters, highest priority first."""
+        for route in sorted(self._all_routes(), key=lambda r: r.priority):
+            while route.waiters and self._can_admit(route):
+                waiter = route.waiters.popleft()
+                if not waiter.done():
+                    self._admit(route)
+                    waiter.set_result(True)
+
+    async def acquire(self, route, timeout=None):
+        deadline = min(route.max_wait, timeout) if timeout else route.max_wait
+        # Don't jump ahead of queued requests of the same or higher priority that
+        # could run now; waiters held back by their own route's limit don't count
+        queued_ahead = any(
+            r.waiters and r.active < r.concurrency
+            for r in self._all_routes() if r.priority <= route.priority
+        )
+        if not queued_ahead and self._can_admit(route):
+            self._admit(route)
+            return
+        estimate = route.estimated_wait()
+        if len(route.waiters) >= route.queue or estimate > deadline:
+            route.rejected += 1
+            raise Rejected(estimate)
+
+        waiter = asyncio.get_running_loop().create_future()
+        route.waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, deadline)
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                return  # admitted just as the deadline passed
+            self._forget(route, waiter)
+            route.rejected += 1
+            raise Rejected(route.estimated_wait())
+        except asyncio.CancelledError:
+            # The client went away; free the slot if one was already granted
+            if waiter.done() and not waiter.cancelled():
+                self._free(route)
+            else:
+                self._forget(route, waiter)
+            raise
+
+    @staticmethod
+    def _forget(route, waiter):
+        if waiter in route.waiters:
+            route.waiters.remove(waiter)
+
+    def _free(self, route):
+        route.active -= 1
+        self.active -= 1
+        self._drain()
+
+    def release(self, route, elapsed):
+        route.service_time = 0.8 * route.service_time + 0.2 * elapsed
+        self._free(route)
+
+    def stats(self):
+        return {
+            "global_limit": self.global_limit,
+            "reserved": self.reserved,
+            "active": self.active,
+            "routes": [route.stats() for route in self._all_routes()],
+        }
+
+
+class AdmissionMiddleware:
+    """ASGI middleware applying an ``AdmissionController`` to HTTP requests."""
+
+    def __init__(self, app, controller):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        route = self.controller.route_for(scope["method"], scope["path"])
+        if route is None:
+            return await self.app(scope, receive, send)
+
+        timeout = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-timeout-ms":
+                try:
+                    timeout = float(value) / 1000
+                except ValueError:
+                    pass
+        try:
+            await self.controller.acquire(route, timeout)
+        except Rejected as e:
+            return await self._reject(send, e.retry_after)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(route, time.perf_counter() - started)
+
+    @staticmethod
+    async def _reject(send, retry_after):
+        body = json.dumps({"detail": "Server is busy. Please retry shortly."}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(retry_after).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
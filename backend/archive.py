@@ -0,0 +1,198 @@
+"""Hot/cold tiering for inquiries.
+
+Complete inquiries older than ``archive_after_days`` are moved, in batches,
+from ``inquiries`` into monthly partitions named ``inquiries_archive_YYYY_MM``.
+Documents are copied before they are deleted, and partitions have a unique
+``id`` index, so an interrupted batch is simply redone on the next pass.
+Range reads only touch the archive when the range reaches past the cutoff;
+``recent`` reads partitions newest first until they can't add anything.
+"""
+import asyncio
+import logging
+from datetime import datetime, timezone, timedelta
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger("archive")
+
+ARCHIVE_PREFIX = "inquiries_archive_"
+DUPLICATE_KEY = 11000
+
+
+def _as_datetime(value):
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    # Stored timestamps are UTC ISO strings and compared as strings
+    return value.astimezone(timezone.utc)
+
+
+def partition_name(created_at):
+    created_at = _as_datetime(created_at)
+    return f"{ARCHIVE_PREFIX}{created_at.year:04d}_{created_at.month:02d}"
+
+
+def partitions_between(start, end):
+    """Partition names for every month touched by [start, end)."""
+    names = []
+    year, month = start.year, start.month
+    while (year, month) <= (end.year, end.month):
+        names.append(f"{ARCHIVE_PREFIX}{year:04d}_{month:02d}")
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return names
+
+
+def _partition_end(name):
+    """Start of the month after the one partition ``name`` holds."""
+    year, month = (int(part) for part in name[len(ARCHIVE_PREFIX):].split("_"))
+    year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return datetime(year, month, 1, tzinfo=timezone.utc)
+
+
+def _newest(results, limit):
+    # A document mid-move can briefly exist in both tiers; the hot copy
+    # (read first) is authoritative, since it may have changed since the copy
+    unique = {}
+    for doc in results:
+        unique.setdefault(doc["id"], doc)
+    return sorted(unique.values(), key=lambda doc: doc["created_at"], reverse=True)[:limit]
+
+
+def parse_date_range(start_date, end_date):
+    """Parse optional ISO dates/datetimes into a UTC [start, end) range.
+
+    A bare date as ``end_date`` includes that whole day. Returns ``None`` when
+    neither bound is given. Raises ``ValueError`` for malformed input.
+    """
+    if not start_date and not end_date:
+        return None
+    start = _as_datetime(start_date) if start_date else datetime(2000, 1, 1, tzinfo=timezone.utc)
+    if end_date:
+        end = _as_datetime(end_date)
+        if len(end_date) == 10:
+            end += timedelta(days=1)
+    else:
+        end = datetime.now(timezone.utc) + timedelta(days=1)
+    if end <= start:
+        raise ValueError("end_date must be after start_date")
+    return start, end
+
+
+class InquiryArchiver:
+    def __init__(self, archive_after_days=30, batch_size=500, interval=3600):
+        self.archive_after_days = archive_after_days
+        self.batch_size = batch_size
+        self.interval = interval
+        self.db = None
+        self._indexed = set()
+        self._task = None
+
+    def bind(self, db):
+        self.db = db
+
+    def cutoff(self):
+        return datetime.now(timezone.utc) - timedelta(days=self.archive_after_days)
+
+    async def ensure_indexes(self):
+        await self.db.inquiries.create_index([("status", 1), ("created_at", 1)])
+
+    async def _ensure_partition(self, name):
+        if name in self._indexed:
+            return
+        await self.db[name].create_index("id", unique=True)
+        await self.db[name].create_index([("created_at", -1)])
+        await self.db[name].create_index([("phone_number", 1), ("created_at", -1)])
+        self._indexed.add(name)
+
+    async def archive_batch(self):
+        """Move one batch of eligible inquiries; return how many were moved."""
+        docs = await self.db.inquiries.find(
+            {"status": "complete", "created_at": {"$lt": self.cutoff().isoformat()}},
+            {"_id": 0}
+        ).sort("created_at", 1).to_list(self.batch_size)
+        if not docs:
+            return 0
+
+        partitions = {}
+        for doc in docs:
+            partitions.setdefault(partition_name(doc["created_at"]), []).append(doc)
+        for name, batch in partitions.items():
+            await self._ensure_partition(name)
+            try:
+                await self.db[name].insert_many(batch, ordered=False)
+            except BulkWriteError as e:
+                # Already copied by an earlier, interrupted pass
+                if any(err.get("code") != DUPLICATE_KEY for err in e.details.get("writeErrors", [])):
+                    raise
+
+        result = await self.db.inquiries.delete_many(
+            {"id": {"$in": [doc["id"] for doc in docs]}, "status": "complete"}
+        )
+        return result.deleted_count
+
+    async def run_pass(self):
+        """Archive until nothing eligible is left, yielding between batches."""
+        moved = 0
+        while True:
+            count = await self.archive_batch()
+            moved += count
+            if count < self.batch_size:
+                break
+            await asyncio.sleep(0)
+        if moved:
+            logger.info(f"Archived {moved} inquiries older than {self.archive_after_days} days")
+        return moved
+
+    async def find(self, query, date_range, limit=1000, db=None):
+        """Read inquiries matching ``query`` within ``date_range`` from hot and,
+        if the range reaches past the cutoff, cold storage. Newest first.
+        ``db`` overrides the bound database handle, e.g. to read from secondaries."""
+        db = self.db if db is None else db
+        start, end = date_range
+        query = dict(query, created_at={"$gte": start.isoformat(), "$lt": end.isoformat()})
+        results = await db.inquiries.find(query, {"_id": 0}).sort("created_at", -1).to_list(limit)
+        if start < self.cutoff():
+            existing = set(await db.list_collection_names(filter={"name": {"$regex": f"^{ARCHIVE_PREFIX}"}}))
+            for name in reversed(partitions_between(start, min(end, self.cutoff()))):
+                if name in existing:
+                    results.extend(
+                        await db[name].find(query, {"_id": 0}).sort("created_at", -1).to_list(limit)
+                    )
+        return _newest(results, limit)
+
+    async def recent(self, query, limit=100, db=None):
+        """The ``limit`` newest inquiries matching ``query`` across hot and cold
+        storage, newest first. Partitions are read newest month first, and only
+        while they could still hold one of the ``limit`` newest."""
+        db = self.db if db is None else db
+        results = await db.inquiries.find(query, {"_id": 0}).sort("created_at", -1).to_list(limit)
+        names = await db.list_collection_names(filter={"name": {"$regex": f"^{ARCHIVE_PREFIX}"}})
+        for name in sorted(names, reverse=True):
+            newest = _newest(results, limit)
+            if len(newest) == limit and _as_datetime(newest[-1]["created_at"]) >= _partition_end(name):
+                break
+            results.extend(await db[name].find(query, {"_id": 0}).sort("created_at", -1).to_list(limit))
+        return _newest(results, limit)
+
+    async def _loop(self):
+        while True:
+            try:
+                await self.run_pass()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Archive pass failed: {str(e)}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self.interval > 0:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
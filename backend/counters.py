@@ -0,0 +1,184 @@
+"""O(1) dashboard summary counters for inquiries.
+
+Counters live in ``inquiry_counters``: one ``totals`` document plus one
+``day:YYYY-MM-DD`` document per business day (in ``BUSINESS_TIMEZONE``), each
+holding ``orders``, ``revenue``, ``pending`` and ``complete``. Inquiry writes
+adjust them with ``$inc``; ``reconcile`` recomputes them from the inquiries
+(hot and archived) to correct any drift.
+
+Reconciling is best-effort: it aggregates first and overwrites afterwards,
+so an ``$inc`` landing in between is lost until the next pass. A lease
+document makes sure only one worker runs the periodic pass.
+"""
+import asyncio
+import logging
+import socket
+import uuid
+from datetime import datetime, timezone, timedelta
+from zoneinfo import ZoneInfo
+from pymongo.errors import DuplicateKeyError
+from archive import ARCHIVE_PREFIX
+
+logger = logging.getLogger("counters")
+
+STATUSES = ("pending", "complete")
+TOTALS = "totals"
+LEASE = "lease:reconcile"
+
+
+def day_key(created_at, tz):
+    """Counter key for the business day (in ``tz``) an inquiry was created."""
+    if isinstance(created_at, str):
+        created_at = datetime.fromisoformat(created_at)
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return f"day:{created_at.astimezone(tz).date().isoformat()}"
+
+
+class InquiryCounters:
+    def __init__(self, collection="inquiry_counters", reconcile_interval=3600, tz="America/New_York"):
+        self.collection_name = collection
+        self.reconcile_interval = reconcile_interval
+        self.tz = ZoneInfo(tz)
+        self.worker_id = f"{socket.gethostname()}:{uuid.uuid4().hex[:6]}"
+        self.db = None
+        self.collection = None
+        self._task = None
+
+    def bind(self, db):
+        self.db = db
+        self.collection = db[self.collection_name]
+
+    async def _inc(self, created_at, changes):
+        changes = {field: value for field, value in changes.items() if value}
+        if not changes:
+            return
+        # Called after the inquiry write has succeeded; a failure here must not
+        # fail that request. The drift is repaired by the next reconcile.
+        try:
+            await asyncio.gather(*(
+                self.collection.update_one({"_id": key}, {"$inc": changes}, upsert=True)
+                for key in (TOTALS, day_key(created_at, self.tz))
+            ))
+        except Exception as e:
+            logger.error(f"Counter update failed, totals will drift until reconciled: {str(e)}")
+
+    async def inquiry_created(self, doc):
+        await self._inc(doc["created_at"], {"orders": 1, "revenue": doc["total"], doc["status"]: 1})
+
+    async def status_changed(self, before, status):
+        """``before`` is the inquiry as it was prior to the status update."""
+        if before["status"] == status:
+            return
+        await self._inc(before["created_at"], {before["status"]: -1, status: 1})
+
+    async def inquiry_deleted(self, doc):
+        await self._inc(doc["created_at"], {"orders": -1, "revenue": -doc["total"], doc["status"]: -1})
+
+    async def summary(self):
+        today = day_key(datetime.now(timezone.utc), self.tz)
+        docs = {
+            doc["_id"]: doc
+            for doc in await self.collection.find({"_id": {"$in": [TOTALS, today]}}).to_list(2)
+        }
+        totals = docs.get(TOTALS, {})
+        day = docs.get(today, {})
+        return {
+            "orders": totals.get("orders", 0),
+            "revenue": round(totals.get("revenue", 0.0), 2),
+            "pending": totals.get("pending", 0),
+            "complete": totals.get("complete", 0),
+            "today": {
+                "date": today[4:],
+                "orders": day.get("orders", 0),
+                "revenue": round(day.get("revenue", 0.0), 2),
+            },
+            "reconciled_at": totals.get("reconciled_at"),
+        }
+
+    async def _count(self, collection):
+        pipeline = [{
+            "$group": {
+                "_id": {
+                    "$dateToString": {
+                        "format": "%Y-%m-%d",
+                        "date": {"$dateFromString": {"dateString": "$created_at"}},
+                        "timezone": self.tz.key,
+                    }
+                },
+                "orders": {"$sum": 1},
+                "revenue": {"$sum": "$total"},
+                **{
+                    status: {"$sum": {"$cond": [{"$eq": ["$status", status]}, 1, 0]}}
+                    for status in STATUSES
+                },
+            }
+        }]
+        return await self.db[collection].aggregate(pipeline).to_list(None)
+
+    async def reconcile(self):
+        """Recompute every counter from the inquiries and overwrite the stored values."""
+        names = ["inquiries"] + sorted(
+            await self.db.list_collection_names(filter={"name": {"$regex": f"^{ARCHIVE_PREFIX}"}})
+        )
+        days = {}
+        for name in names:
+            for row in await self._count(name):
+                day = days.setdefault(f"day:{row['_id']}", {"orders": 0, "revenue": 0.0, "pending": 0, "complete": 0})
+                for field in day:
+                    day[field] += row[field]
+
+        totals = {field: sum(day[field] for day in days.values()) for field in ("orders", "revenue", "pending", "complete")}
+        totals["revenue"] = round(totals["revenue"], 2)
+        totals["reconciled_at"] = datetime.now(timezone.utc).isoformat()
+        await self.collection.update_one({"_id": TOTALS}, {"$set": totals}, upsert=True)
+        for key, values in days.items():
+            values["revenue"] = round(values["revenue"], 2)
+            await self.collection.update_one({"_id": key}, {"$set": values}, upsert=True)
+        await self.collection.delete_many({"_id": {"$regex": "^day:", "$nin": list(days)}})
+        logger.info(f"Reconciled inquiry counters across {len(names)} collection(s)")
+        return totals
+
+    async def _acquire_lease(self):
+        """Take or renew the reconcile lease; False while another worker holds it."""
+        now = datetime.now(timezone.utc)
+        try:
+            await self.collection.update_one(
+                {"_id": LEASE, "$or": [{"expires_at": {"$lte": now}}, {"holder": self.worker_id}]},
+                {"$set": {
+                    "holder": self.worker_id,
+                    # Outlasts one interval so the holder keeps it between passes
+                    "expires_at": now + timedelta(seconds=self.reconcile_interval * 1.5),
+                }},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            return False
+        return True
+
+    async def _loop(self):
+        # Seed counters for existing data on first run, then correct drift periodically
+        if await self.collection.find_one({"_id": TOTALS}) is not None:
+            await asyncio.sleep(self.reconcile_interval)
+        while True:
+            try:
+                if await self._acquire_lease():
+                    await self.reconcile()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Counter reconcile failed: {str(e)}")
+            await asyncio.sleep(self.reconcile_interval)
+
+    def start(self):
+        if self.reconcile_interval > 0:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
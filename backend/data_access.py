@@ -0,0 +1,163 @@
+"""Mongo client construction, read routing and pool metrics.
+
+Pool sizes, timeouts and retry behaviour come from the environment:
+
+    MONGO_MAX_POOL_SIZE              (100)
+    MONGO_MIN_POOL_SIZE              (0)
+    MONGO_MAX_IDLE_TIME_MS           (300000)
+    MONGO_WAIT_QUEUE_TIMEOUT_MS      (2000)
+    MONGO_SERVER_SELECTION_TIMEOUT_MS (5000)
+    MONGO_CONNECT_TIMEOUT_MS         (5000)
+    MONGO_SOCKET_TIMEOUT_MS          (10000)
+    MONGO_RETRY_READS / MONGO_RETRY_WRITES (true)
+
+Public catalog reads use a database handle with
+``MONGO_CATALOG_READ_PREFERENCE`` (``secondaryPreferred``) and bounded
+staleness ``MONGO_CATALOG_MAX_STALENESS_SECONDS`` (90, the server minimum).
+Everything else, including all writes, stays on the primary.
+"""
+import threading
+import time
+from collections import deque
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+from pymongo.read_preferences import Nearest, Primary, PrimaryPreferred, Secondary, SecondaryPreferred
+
+MIN_MAX_STALENESS_SECONDS = 90
+READ_PREFERENCES = {
+    "primary": Primary,
+    "primaryPreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondaryPreferred": SecondaryPreferred,
+    "nearest": Nearest,
+}
+
+
+def _flag(value):
+    return str(value).lower() in ("1", "true", "yes")
+
+
+def client_settings(env):
+    """Keyword arguments for ``AsyncIOMotorClient`` built from ``env``."""
+    return {
+        "maxPoolSize": int(env.get("MONGO_MAX_POOL_SIZE", "100")),
+        "minPoolSize": int(env.get("MONGO_MIN_POOL_SIZE", "0")),
+        "maxIdleTimeMS": int(env.get("MONGO_MAX_IDLE_TIME_MS", "300000")),
+        "waitQueueTimeoutMS": int(env.get("MONGO_WAIT_QUEUE_TIMEOUT_MS", "2000")),
+        "serverSelectionTimeoutMS": int(env.get("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000")),
+        "connectTimeoutMS": int(env.get("MONGO_CONNECT_TIMEOUT_MS", "5000")),
+        "socketTimeoutMS": int(env.get("MONGO_SOCKET_TIMEOUT_MS", "10000")),
+        "retryReads": _flag(env.get("MONGO_RETRY_READS", "true")),
+        "retryWrites": _flag(env.get("MONGO_RETRY_WRITES", "true")),
+    }
+
+
+def catalog_read_preference(env):
+    mode = env.get("MONGO_CATALOG_READ_PREFERENCE", "secondaryPreferred")
+    if mode not in READ_PREFERENCES:
+        raise ValueError(f"Unknown MONGO_CATALOG_READ_PREFERENCE '{mode}'")
+    if mode == "primary":
+        return Primary()
+    staleness = int(env.get("MONGO_CATALOG_MAX_STALENESS_SECONDS", str(MIN_MAX_STALENESS_SECONDS)))
+    if staleness != -1 and staleness < MIN_MAX_STALENESS_SECONDS:
+        raise ValueError(f"MONGO_CATALOG_MAX_STALENESS_SECONDS must be -1 or at least {MIN_MAX_STALENESS_SECONDS}")
+    return READ_PREFERENCES[mode](max_staleness=staleness)
+
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """Connection pool listener tracking checkout wait times and pool usage."""
+
+    def __init__(self, samples=2048):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._waits = deque(maxlen=samples)
+        self.checkouts = 0
+        self.failed_checkouts = {}
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+        self.pools = {}
+
+    def _pool(self, address):
+        key = f"{address[0]}:{address[1]}"
+        if key not in self.pools:
+            self.pools[key] = {"open": 0, "in_use": 0, "cleared": 0}
+        return self.pools[key]
+
+    # Check-out started/finished events fire on the same thread, so a
+    # thread-local start time pairs them up.
+    def connection_check_out_started(self, event):
+        self._local.started = time.perf_counter()
+
+    def _waited_ms(self):
+        started = getattr(self._local, "started", None)
+        self._local.started = None
+        return (time.perf_counter() - started) * 1000 if started is not None else 0.0
+
+    def connection_checked_out(self, event):
+        waited = self._waited_ms()
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait_ms += waited
+            self.max_wait_ms = max(self.max_wait_ms, waited)
+            self._waits.append(waited)
+            self._pool(event.address)["in_use"] += 1
+
+    def connection_check_out_failed(self, event):
+        self._waited_ms()
+        with self._lock:
+            reason = str(event.reason)
+            self.failed_checkouts[reason] = self.failed_checkouts.get(reason, 0) + 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self._pool(event.address)["in_use"] -= 1
+
+    def connection_created(self, event):
+        with self._lock:
+            self._pool(event.address)["open"] += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self._pool(event.address)["open"] -= 1
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self._pool(event.address)["cleared"] += 1
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def snapshot(self):
+        with self._lock:
+            waits = sorted(self._waits)
+            percentile = lambda q: round(waits[min(len(waits) - 1, int(q * len(waits)))], 3) if waits else 0.0
+            return {
+                "checkouts": self.checkouts,
+                "failed_checkouts": dict(self.failed_checkouts),
+                "wait_ms": {
+                    "avg": round(self.total_wait_ms / self.checkouts, 3) if self.checkouts else 0.0,
+                    "p50": percentile(0.50),
+                    "p95": percentile(0.95),
+                    "p99": percentile(0.99),
+                    "max": round(self.max_wait_ms, 3),
+                },
+                "pools": {address: dict(pool) for address, pool in self.pools.items()},
+            }
+
+
+def create_client(url, env, listeners=()):
+    return AsyncIOMotorClient(url, event_listeners=list(listeners), **client_settings(env))
+
+
+def catalog_database(client, name, env):
+    """Database handle for public catalog reads, routed per the configured read preference."""
+    return client.get_database(name, read_preference=catalog_read_preference(env))
@@ -0,0 +1,89 @@
+"""Cached, rate-limited address geocoding.
+
+Results are cached per normalized address in ``geocode_cache`` (an address
+that could not be found is cached too) and expire after ``cache_ttl``
+seconds via a TTL index on ``updated_at``.
+
+Nominatim's usage policy allows one request per second per application, so
+lookups reserve a slot in a shared ``rate_limits`` document first. Every
+process using the same database shares that budget.
+"""
+import asyncio
+import logging
+from datetime import datetime, timezone, timedelta
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger("geocoding")
+
+
+def normalize_address(address):
+    """Cache key for ``address``: lower case with whitespace collapsed."""
+    return " ".join(address.lower().split())
+
+
+def _as_utc(value):
+    # Motor returns naive datetimes unless the client is tz_aware
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+class Geocoder:
+    def __init__(self, lookup, name="nominatim", min_interval=1.0, cache_ttl=30 * 86400,
+                 cache_collection="geocode_cache", limits_collection="rate_limits"):
+        """``lookup`` is a blocking ``address -> (latitude, longitude) or None`` call."""
+        self.lookup = lookup
+        self.name = name
+        self.min_interval = min_interval
+        self.cache_ttl = cache_ttl
+        self.cache_collection = cache_collection
+        self.limits_collection = limits_collection
+        self.cache = None
+        self.limits = None
+
+    def bind(self, db):
+        self.cache = db[self.cache_collection]
+        self.limits = db[self.limits_collection]
+
+    async def ensure_indexes(self):
+        await self.cache.create_index("updated_at", expireAfterSeconds=self.cache_ttl)
+
+    async def _wait_turn(self):
+        """Reserve the next lookup slot, sleeping until one is free."""
+        if self.min_interval <= 0:
+            return
+        while True:
+            now = datetime.now(timezone.utc)
+            try:
+                await self.limits.update_one(
+                    {"_id": self.name, "next_at": {"$lte": now}},
+                    {"$set": {"next_at": now + timedelta(seconds=self.min_interval)}},
+                    upsert=True
+                )
+                return
+            except DuplicateKeyError:
+                # Another caller holds the current slot
+                pass
+            limit = await self.limits.find_one({"_id": self.name})
+            wait = (_as_utc(limit["next_at"]) - now).total_seconds() if limit else 0
+            await asyncio.sleep(min(max(wait, 0.01), self.min_interval))
+
+    async def geocode(self, address):
+        """Return ``(latitude, longitude)`` for ``address``, or None if it can't be found.
+
+        Geocoder errors propagate and are not cached.
+        """
+        key = normalize_address(address)
+        cached = await self.cache.find_one({"_id": key})
+        if cached:
+            return tuple(cached["coords"]) if cached["coords"] else None
+
+        await self._wait_turn()
+        coords = await asyncio.to_thread(self.lookup, address)
+        try:
+            await self.cache.update_one(
+                {"_id": key},
+                {"$set": {"coords": list(coords) if coords else None, "updated_at": datetime.now(timezone.utc)}},
+                upsert=True
+            )
+        except Exception as e:
+            logger.error(f"Could not cache geocode result: {str(e)}")
+        return coords
@@ -0,0 +1,208 @@
+"""Cross-worker cache invalidation bus.
+
+Admin writes publish a versioned "catalog changed" event. Every worker that
+did not make the change runs its subscribers (clear caches, rebuild the price
+index). Two transports are available:
+
+* ``MongoInvalidationBus``: events go into a capped collection and each worker
+  follows it with a tailable, awaitable cursor. The server pushes new events as
+  they are written, so workers do not poll with repeated queries.
+* ``LocalInvalidationBus``: the version is a counter in a named shared-memory
+  segment. It works for workers on one host without Mongo support and is read
+  every few milliseconds without touching the database.
+"""
+import asyncio
+import fcntl
+import logging
+import os
+import struct
+import tempfile
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from multiprocessing import resource_tracker, shared_memory
+from pymongo import CursorType, ReturnDocument
+from pymongo.errors import CollectionInvalid, OperationFailure
+
+logger = logging.getLogger("invalidation")
+
+NAMESPACE_EXISTS = 48
+
+
+class InvalidationBus(ABC):
+    def __init__(self):
+        self.origin = uuid.uuid4().hex
+        self.version = 0
+        self._subscribers = []
+        self._task = None
+        self._running = False
+        self._dirty = False
+
+    def subscribe(self, callback):
+        """Register ``async def callback(event)`` for changes made by other workers."""
+        self._subscribers.append(callback)
+        return callback
+
+    async def _notify(self, event):
+        # Coalesce bursts: one run of the subscribers covers every event seen meanwhile
+        if self._running:
+            self._dirty = True
+            return
+        self._running = True
+        try:
+            while True:
+                self._dirty = False
+                for callback in self._subscribers:
+                    try:
+                        await callback(event)
+                    except Exception as e:
+                        logger.error(f"Invalidation subscriber failed: {str(e)}")
+                if not self._dirty:
+                    break
+        finally:
+            self._running = False
+
+    def _observe(self, version, event, own=False):
+        """Advance to ``version``; notify unless this worker made every change since the last one."""
+        previous = self.version
+        if version <= previous:
+            return
+        self.version = version
+        if not own or version > previous + 1:
+            asyncio.ensure_future(self._notify(event))
+
+    @abstractmethod
+    async def publish(self, scope):
+        """Record a change to ``scope`` and return the new version."""
+
+    @abstractmethod
+    async def start(self):
+        """Load the current version and begin watching for changes."""
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+class MongoInvalidationBus(InvalidationBus):
+    def __init__(self, db, collection="catalog_events", size_bytes=1024 * 1024, max_events=1000):
+        super().__init__()
+        self.db = db
+        self.collection_name = collection
+        self.size_bytes = size_bytes
+        self.max_events = max_events
+
+    async def start(self):
+        try:
+            await self.db.create_collection(
+                self.collection_name, capped=True, size=self.size_bytes, max=self.max_events
+            )
+        except CollectionInvalid:
+            pass
+        except OperationFailure as e:
+            # Another worker created it between the existence check and the create
+            if e.code != NAMESPACE_EXISTS:
+                raise
+        # A tailable cursor on an empty capped collection dies immediately. Seed
+        # it even if it already existed, in case a crash left it empty.
+        if await self.db[self.collection_name].find_one({}) is None:
+            await self.db[self.collection_name].insert_one({"version": 0, "scope": "init"})
+        state = await self.db.catalog_version.find_one({"_id": "catalog"})
+        self.version = state["version"] if state else 0
+        self._task = asyncio.create_task(self._follow())
+
+    async def publish(self, scope):
+        state = await self.db.catalog_version.find_one_and_update(
+            {"_id": "catalog"},
+            {"$inc": {"version": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        event = {
+            "version": state["version"],
+            "scope": scope,
+            "origin": self.origin,
+            "created_at": datetime.now(timezone.utc),
+        }
+        await self.db[self.collection_name].insert_one(event)
+        self._observe(event["version"], event, own=True)
+        return event["version"]
+
+    async def _follow(self):
+        while True:
+            try:
+                cursor = self.db[self.collection_name].find(
+                    {"version": {"$gt": self.version}},
+                    cursor_type=CursorType.TAILABLE_AWAIT
+                )
+                while cursor.alive:
+                    async for event in cursor:
+                        self._observe(event["version"], event, own=event.get("origin") == self.origin)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Invalidation cursor error: {str(e)}")
+            # The cursor died (e.g. the collection was dropped); reopen it shortly
+            await asyncio.sleep(1)
+
+
+class LocalInvalidationBus(InvalidationBus):
+    COUNTER = struct.Struct("q")
+
+    def __init__(self, name, poll_interval=0.005):
+        super().__init__()
+        self.name = name
+        self.poll_interval = poll_interval
+        self.lock_path = os.path.join(tempfile.gettempdir(), f"{name}.lock")
+        self._shm = None
+
+    def _locked(self):
+        lock = open(self.lock_path, "a")
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        return lock
+
+    def _read(self):
+        return self.COUNTER.unpack_from(self._shm.buf, 0)[0]
+
+    async def start(self):
+        with self._locked():
+            try:
+                self._shm = shared_memory.SharedMemory(name=self.name, create=True, size=self.COUNTER.size)
+                self.COUNTER.pack_into(self._shm.buf, 0, 0)
+            except FileExistsError:
+                self._shm = shared_memory.SharedMemory(name=self.name)
+        # The segment outlives any one worker; don't let this process's tracker unlink it on exit
+        resource_tracker.unregister(self._shm._name, "shared_memory")
+        self.version = self._read()
+        self._task = asyncio.create_task(self._watch())
+
+    async def publish(self, scope):
+        with self._locked():
+            version = self._read() + 1
+            self.COUNTER.pack_into(self._shm.buf, 0, version)
+        self._observe(version, {"version": version, "scope": scope}, own=True)
+        return version
+
+    async def _watch(self):
+        while True:
+            version = self._read()
+            if version > self.version:
+                self._observe(version, {"version": version, "scope": "catalog"})
+            await asyncio.sleep(self.poll_interval)
+
+    async def stop(self):
+        await super().stop()
+        if self._shm is not None:
+            self._shm.close()
+            self._shm = None
+
+
+def create_bus(kind, db, name):
+    if kind == "local":
+        return LocalInvalidationBus(name)
+    return MongoInvalidationBus(db)
@@ -0,0 +1,245 @@
+"""Lightweight persistent job queue backed by a Mongo collection.
+
+Jobs are claimed with an atomic ``find_one_and_update`` that leases them for
+``visibility_timeout`` seconds; a job whose worker dies becomes visible again
+once its lease expires. Failed jobs are retried with exponential backoff until
+``max_attempts`` is reached. ``idempotency_key`` is unique, so enqueueing the
+same work twice is a no-op. Finished (``done`` or ``failed``) jobs are removed
+by a TTL index ``retention`` seconds after ``finished_at``.
+
+Workers run inside the app process (``JOB_WORKERS``) or separately via
+``python worker.py``.
+"""
+import asyncio
+import logging
+import random
+import socket
+import uuid
+from datetime import datetime, timezone, timedelta
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger("jobs")
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+DUPLICATE_KEY = 11000
+
+
+class JobQueue:
+    def __init__(self, collection="jobs", visibility_timeout=60, max_attempts=5,
+                 backoff_base=2.0, backoff_max=300.0, poll_interval=1.0, retention=7 * 86400):
+        self.collection_name = collection
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self.handlers = {}
+        self.collection = None
+        self._tasks = []
+        self._stopping = None
+        self._wakeup = None
+
+    def handler(self, job_type):
+        """Register an ``async def handler(payload)`` for ``job_type``."""
+        def register(func):
+            self.handlers[job_type] = func
+            return func
+        return register
+
+    def bind(self, db):
+        self.collection = db[self.collection_name]
+
+    async def ensure_indexes(self):
+        await self.collection.create_index("idempotency_key", unique=True)
+        await self.collection.create_index([("status", 1), ("run_at", 1)])
+        # Only finished jobs carry finished_at; anything re-queued has it unset
+        await self.collection.create_index(
+            "finished_at",
+            expireAfterSeconds=self.retention,
+            partialFilterExpression={"finished_at": {"$exists": True}}
+        )
+
+    @staticmethod
+    def _new_job(job_type, payload, now, delay=0):
+        return {
+            "id": str(uuid.uuid4()),
+            "type": job_type,
+            "payload": payload,
+            "status": "queued",
+            "attempts": 0,
+            "run_at": now + timedelta(seconds=delay),
+            "locked_until": EPOCH,
+            "locked_by": None,
+            "last_error": None,
+            "created_at": now,
+        }
+
+    async def enqueue(self, job_type, payload, idempotency_key=None, delay=0):
+        """Persist a job and return its id (the existing id for a duplicate key)."""
+        now = datetime.now(timezone.utc)
+        key = idempotency_key or str(uuid.uuid4())
+        # One round trip: insert unless the key exists, and read back whichever job won
+        existing = await self.collection.find_one_and_update(
+            {"idempotency_key": key},
+            {"$setOnInsert": self._new_job(job_type, payload, now, delay)},
+            upsert=True,
+            projection={"_id": 0, "id": 1},
+            return_document=ReturnDocument.AFTER
+        )
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return existing["id"]
+
+    async def enqueue_many(self, job_type, jobs, requeue_failed_after=None):
+        """Persist ``(payload, idempotency_key)`` pairs in one round trip.
+
+        Keys that already have a job are left untouched, except that with
+        ``requeue_failed_after`` (seconds) a job that failed permanently at least
+        that long ago is queued again with fresh attempts. Returns how many jobs
+        were created or re-queued.
+        """
+        if not jobs:
+            return 0
+        now = datetime.now(timezone.utc)
+        requests = []
+        for payload, key in jobs:
+            if requeue_failed_after is not None:
+                requests.append(UpdateOne(
+                    {
+                        "idempotency_key": key,
+                        "status": "failed",
+                        "finished_at": {"$lte": now - timedelta(seconds=requeue_failed_after)},
+                    },
+                    {
+                        "$set": {"status": "queued", "attempts": 0, "run_at": now, "locked_until": EPOCH},
+                        "$unset": {"finished_at": ""},
+                    }
+                ))
+            requests.append(UpdateOne(
+                {"idempotency_key": key},
+                {"$setOnInsert": self._new_job(job_type, payload, now)},
+                upsert=True
+            ))
+        try:
+            result = await self.collection.bulk_write(requests, ordered=False)
+            queued = result.upserted_count + result.modified_count
+        except BulkWriteError as e:
+            # A concurrent upsert of the same key won the race; that job stands
+            if any(error["code"] != DUPLICATE_KEY for error in e.details["writeErrors"]):
+                raise
+            queued = e.details["nUpserted"] + e.details["nModified"]
+        if queued and self._wakeup is not None:
+            self._wakeup.set()
+        return queued
+
+    async def claim(self, worker_id):
+        """Lease the next due job, or return None when the queue is idle."""
+        now = datetime.now(timezone.utc)
+        return await self.collection.find_one_and_update(
+            {
+                "status": {"$in": ["queued", "running"]},
+                "run_at": {"$lte": now},
+                "locked_until": {"$lte": now},
+            },
+            {
+                "$set": {
+                    "status": "running",
+                    "locked_by": worker_id,
+                    "locked_until": now + timedelta(seconds=self.visibility_timeout),
+                },
+                "$inc": {"attempts": 1},
+            },
+            sort=[("run_at", 1)],
+            projection={"_id": 0},
+            return_document=ReturnDocument.AFTER
+        )
+
+    def backoff(self, attempts):
+        delay = min(self.backoff_max, self.backoff_base * (2 ** (attempts - 1)))
+        return delay * random.uniform(0.5, 1.0)
+
+    async def run_once(self, worker_id):
+        """Claim and run a single job; return False when nothing was due."""
+        job = await self.claim(worker_id)
+        if job is None:
+            return False
+
+        lease = {"id": job["id"], "locked_by": worker_id}
+        handler = self.handlers.get(job["type"])
+        try:
+            if handler is None:
+                raise LookupError(f"No handler registered for job type '{job['type']}'")
+            if job["attempts"] > self.max_attempts:
+                raise RuntimeError("Lease expired on the final attempt")
+            await handler(job["payload"])
+        except Exception as e:
+            now = datetime.now(timezone.utc)
+            if handler is None or job["attempts"] >= self.max_attempts:
+                logger.error(f"Job {job['id']} ({job['type']}) failed permanently: {str(e)}")
+                update = {"status": "failed", "last_error": str(e), "finished_at": now}
+            else:
+                delay = self.backoff(job["attempts"])
+                logger.warning(f"Job {job['id']} ({job['type']}) failed, retrying in {delay:.1f}s: {str(e)}")
+                update = {
+                    "status": "queued",
+                    "last_error": str(e),
+                    "run_at": now + timedelta(seconds=delay),
+                    "locked_until": EPOCH,
+                }
+            await self.collection.update_one(lease, {"$set": update})
+            return True
+
+        await self.collection.update_one(
+            lease,
+            {"$set": {"status": "done", "finished_at": datetime.now(timezone.utc)}}
+        )
+        return True
+
+    async def _work(self, worker_id):
+        while not self._stopping.is_set():
+            try:
+                if await self.run_once(worker_id):
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Job worker {worker_id} error: {str(e)}")
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self, workers=1):
+        """Start ``workers`` worker tasks on the running event loop."""
+        self._stopping = asyncio.Event()
+        self._wakeup = asyncio.Event()
+        prefix = f"{socket.gethostname()}:{uuid.uuid4().hex[:6]}"
+        self._tasks = [asyncio.create_task(self._work(f"{prefix}:{n}")) for n in range(workers)]
+        if workers:
+            logger.info(f"Started {workers} job worker(s)")
+
+    def request_stop(self):
+        self._stopping.set()
+        self._wakeup.set()
+
+    async def stop(self, timeout=10.0):
+        """Let in-flight jobs finish (up to ``timeout``), then cancel the workers."""
+        if not self._tasks:
+            return
+        self.request_stop()
+        done, pending = await asyncio.wait(self._tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        self._tasks = []
+
+    async def run_forever(self, workers=1):
+        """Run workers until ``request_stop`` is called (e.g. from a signal handler)."""
+        if not self._tasks:
+            self.start(workers)
+        try:
+            await self._stopping.wait()
+        finally:
+            await self.stop()
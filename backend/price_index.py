@@ -0,0 +1,97 @@
+"""In-memory price index for server-side cart validation.
+
+Maps ``menu_item_id -> {"discount": ..., "variants": {variant_name: price}}``
+so a submitted cart can be priced in O(items) without touching Mongo. The
+index is rebuilt at startup and patched by the admin menu endpoints.
+"""
+import logging
+
+logger = logging.getLogger("price_index")
+
+# Matches the Flight Pass upsell the customer view adds to the cart total
+FLIGHT_PASS_FEE = 50.0
+TOLERANCE = 0.01
+# Ids looked up and not found are remembered until the next rebuild, so
+# bogus ids can't force a database read per request. Bounded against abuse.
+MAX_UNKNOWN_IDS = 10000
+
+
+class PriceMismatch(ValueError):
+    """A submitted cart does not match current menu prices."""
+
+
+class PriceIndex:
+    def __init__(self):
+        self._items = {}
+        self._unknown = set()
+        self.ready = False
+
+    @staticmethod
+    def _entry(doc):
+        return {
+            "discount": float(doc.get("discount") or 0.0),
+            "variants": {v["name"]: float(v["price"]) for v in doc.get("variants", [])},
+        }
+
+    async def rebuild(self, db):
+        docs = await db.menu_items.find({}, {"_id": 0, "id": 1, "variants": 1, "discount": 1}).to_list(None)
+        # Build aside and swap so readers never see a half-built index
+        self._items = {doc["id"]: self._entry(doc) for doc in docs}
+        self._unknown = set()
+        self.ready = True
+        logger.info(f"Price index rebuilt with {len(self._items)} items")
+
+    async def refresh_items(self, db, item_ids):
+        """Reload specific items, e.g. ones created after the last rebuild."""
+        docs = await db.menu_items.find(
+            {"id": {"$in": list(item_ids)}},
+            {"_id": 0, "id": 1, "variants": 1, "discount": 1}
+        ).to_list(None)
+        for doc in docs:
+            self._items[doc["id"]] = self._entry(doc)
+        not_found = set(item_ids) - {doc["id"] for doc in docs}
+        if len(self._unknown) + len(not_found) > MAX_UNKNOWN_IDS:
+            self._unknown.clear()
+        self._unknown.update(not_found)
+
+    def update_item(self, item_id, variants, discount):
+        self._items[item_id] = self._entry({"variants": variants, "discount": discount})
+        self._unknown.discard(item_id)
+
+    def remove_item(self, item_id):
+        self._items.pop(item_id, None)
+
+    def missing(self, items):
+        """Ids not in the index that haven't already been looked up and not found."""
+        return {
+            item.menu_item_id for item in items
+            if item.menu_item_id not in self._items and item.menu_item_id not in self._unknown
+        }
+
+    def price_cart(self, items):
+        """Recompute the cart total from indexed prices.
+
+        Raises ``PriceMismatch`` when an item or variant is unknown, or when the
+        client's unit price or discount differs from the menu.
+        """
+        total = 0.0
+        for item in items:
+            entry = self._items.get(item.menu_item_id)
+            if entry is None:
+                raise PriceMismatch(f"'{item.title}' is no longer available")
+            price = entry["variants"].get(item.variant_name)
+            if price is None:
+                raise PriceMismatch(f"'{item.title}' is no longer available in {item.variant_name}")
+            if item.quantity < 1:
+                raise PriceMismatch(f"Invalid quantity for '{item.title}'")
+            if abs(item.variant_price - price) > TOLERANCE or abs(item.discount - entry["discount"]) > TOLERANCE:
+                raise PriceMismatch(f"The price of '{item.title}' has changed. Please refresh the menu.")
+            total += price * item.quantity * (1 - entry["discount"] / 100)
+        return round(total, 2)
+
+    def check_total(self, items, total):
+        """Validate a client total, which may include the Flight Pass fee."""
+        cart_total = self.price_cart(items)
+        if not any(abs(total - (cart_total + fee)) <= TOLERANCE for fee in (0.0, FLIGHT_PASS_FEE)):
+            raise PriceMismatch(f"Cart total {total:.2f} does not match current prices ({cart_total:.2f})")
+        return cart_total
@@ -0,0 +1,289 @@
+"""Slow-query profiler.
+
+Hooks into pymongo command monitoring, records every operation slower than
+``SLOW_QUERY_MS`` under its filter *shape* (literals stripped), and captures
+an ``explain()`` plan for each new shape in the background so the admin
+summary can suggest indexes. ``getMore`` batches count toward the query that
+opened the cursor.
+"""
+import asyncio
+import logging
+import threading
+import time
+from pymongo import monitoring
+
+logger = logging.getLogger("slow_queries")
+
+# Commands that are timed, with the field holding their filter
+PROFILED_COMMANDS = {
+    "find": "filter",
+    "aggregate": "pipeline",
+    "count": "query",
+    "distinct": "query",
+    "findAndModify": "query",
+    "update": "updates",
+    "delete": "deletes",
+    "insert": None,
+}
+# Commands that are timed but have no plan to explain
+UNEXPLAINABLE_COMMANDS = {"insert"}
+# Open cursors tracked for getMore attribution; beyond this, new ones are ignored
+MAX_TRACKED_CURSORS = 10000
+RANGE_OPERATORS = {"$gt", "$gte", "$lt", "$lte", "$ne", "$nin", "$regex", "$exists"}
+EQUALITY_OPERATORS = {"$eq", "$in"}
+# Driver-added fields that must not be forwarded to explain
+DRIVER_FIELDS = {"lsid", "$db", "$clusterTime", "txnNumber", "$readPreference", "readConcern", "writeConcern"}
+
+
+def shape_of(value):
+    """Replace literal values with placeholders, keeping field names and operators."""
+    if isinstance(value, dict):
+        return {key: shape_of(val) for key, val in value.items()}
+    if isinstance(value, (list, tuple)):
+        if value and all(isinstance(val, dict) for val in value):
+            return [shape_of(val) for val in value]
+        return ["?"]
+    return "?"
+
+
+def _filter_of(command_name, command):
+    field = PROFILED_COMMANDS[command_name]
+    if field is None:
+        return {}
+    if command_name == "aggregate":
+        pipeline = command.get("pipeline") or []
+        if pipeline and "$match" in pipeline[0]:
+            return pipeline[0]["$match"]
+        return {}
+    if command_name in ("update", "delete"):
+        statements = command.get(field) or []
+        return statements[0].get("q", {}) if statements else {}
+    return command.get(field) or {}
+
+
+def _shape_key(collection, command_name, filter_shape, sort_shape):
+    return f"{collection}.{command_name} {filter_shape!r} sort={sort_shape!r}"
+
+
+def _collect_fields(query, equality, ranges, regexes):
+    for key, value in query.items():
+        if key in ("$or", "$and", "$nor"):
+            for clause in value:
+                _collect_fields(clause, equality, ranges, regexes)
+            continue
+        if key.startswith("$"):
+            continue
+        if isinstance(value, dict) and any(op.startswith("$") for op in value):
+            operators = set(value)
+            if "$regex" in operators:
+                regexes.append(key)
+            elif operators & RANGE_OPERATORS:
+                ranges.append(key)
+            elif operators & EQUALITY_OPERATORS:
+                equality.append(key)
+        else:
+            equality.append(key)
+
+
+def _plan_stages(plan):
+    """Yield every stage name in a (possibly nested) winning plan."""
+    if not isinstance(plan, dict):
+        return
+    if "stage" in plan:
+        yield plan["stage"]
+    for child_key in ("inputStage", "queryPlan"):
+        yield from _plan_stages(plan.get(child_key))
+    for child in plan.get("inputStages", []):
+        yield from _plan_stages(child)
+
+
+def _winning_plan(explain):
+    planner = explain.get("queryPlanner")
+    if planner is None:
+        # Aggregations report the planner under their first $cursor stage
+        for stage in explain.get("stages", []):
+            if "$cursor" in stage:
+                planner = stage["$cursor"].get("queryPlanner")
+                break
+    return (planner or {}).get("winningPlan", {})
+
+
+def suggest_index(filter_shape, sort_shape, explain):
+    """Suggest a compound index following the equality / sort / range rule.
+
+    Returns ``None`` when the captured plan already uses an index without an
+    in-memory sort.
+    """
+    stages = set(_plan_stages(_winning_plan(explain))) if explain else set()
+    if explain and "COLLSCAN" not in stages and "SORT" not in stages:
+        return None
+
+    equality, ranges, regexes = [], [], []
+    _collect_fields(filter_shape or {}, equality, ranges, regexes)
+    keys = []
+    for field in equality:
+        if field not in dict(keys):
+            keys.append((field, 1))
+    for field, direction in (sort_shape or {}).items():
+        if field not in dict(keys):
+            keys.append((field, direction if direction in (1, -1) else 1))
+    for field in ranges:
+        if field not in dict(keys):
+            keys.append((field, 1))
+    if not keys:
+        return None
+
+    suggestion = {"keys": [list(key) for key in keys], "reason": sorted(stages & {"COLLSCAN", "SORT"})}
+    if regexes:
+        suggestion["note"] = (
+            f"Regex on {', '.join(sorted(set(regexes)))} cannot use an index unless it is "
+            "anchored and case-sensitive; consider a text index or a normalized field"
+        )
+    return suggestion
+
+
+class SlowQueryProfiler(monitoring.CommandListener):
+    """Command listener that aggregates slow operations by query shape."""
+
+    def __init__(self, threshold_ms=100.0, max_shapes=500):
+        self.threshold_ms = threshold_ms
+        self.max_shapes = max_shapes
+        self.shapes = {}
+        self._pending = {}
+        self._cursors = {}
+        self._lock = threading.Lock()
+        self._loop = None
+        self._db = None
+
+    def attach(self, loop, db):
+        """Enable background explain capture on ``loop`` using ``db``."""
+        self._loop = loop
+        self._db = db
+
+    # pymongo callbacks run on the driver's thread; keep them cheap
+    def started(self, event):
+        name = event.command_name
+        command = event.command
+        if name == "killCursors":
+            for cursor_id in command.get("cursors") or []:
+                self._cursors.pop(cursor_id, None)
+            return
+        if name == "getMore":
+            cursor_id = command.get("getMore")
+            origin = self._cursors.get(cursor_id)
+            if origin:
+                self._pending[event.request_id] = origin + (cursor_id,)
+            return
+        if name not in PROFILED_COMMANDS:
+            return
+        filter_shape = shape_of(_filter_of(name, command))
+        sort_shape = dict(command.get("sort") or {})
+        key = _shape_key(command.get(name), name, filter_shape, sort_shape)
+        explainable = None if name in UNEXPLAINABLE_COMMANDS else command
+        self._pending[event.request_id] = (key, filter_shape, sort_shape, explainable, None)
+
+    def succeeded(self, event):
+        pending = self._pending.pop(event.request_id, None)
+        if pending is None:
+            return
+        key, filter_shape, sort_shape, command, cursor_id = pending
+        reply = event.reply or {}
+        cursor = reply.get("cursor") or {}
+        batch = cursor.get("firstBatch", cursor.get("nextBatch"))
+        docs = len(batch) if batch is not None else reply.get("n", 0)
+        duration_ms = event.duration_micros / 1000.0
+
+        if cursor_id is not None:
+            # Attribute follow-up batches to the shape that opened the cursor
+            if not cursor.get("id"):
+                self._cursors.pop(cursor_id, None)
+            if self._extend(key, duration_ms, docs) and duration_ms < self.threshold_ms:
+                return
+        elif cursor.get("id") and len(self._cursors) < MAX_TRACKED_CURSORS:
+            self._cursors[cursor["id"]] = (key, filter_shape, sort_shape, command)
+
+        if duration_ms < self.threshold_ms:
+            return
+        if cursor_id is None or key not in self.shapes:
+            self._record(key, filter_shape, sort_shape, command, duration_ms, docs)
+        logger.warning(f"Slow {event.command_name} {duration_ms:.1f}ms docs={docs} {key}")
+
+    def failed(self, event):
+        self._pending.pop(event.request_id, None)
+
+    def _extend(self, key, duration_ms, docs):
+        """Add a getMore to an already-recorded shape; False if the shape isn't recorded."""
+        with self._lock:
+            entry = self.shapes.get(key)
+            if entry is None:
+                return False
+            entry["total_ms"] += duration_ms
+            entry["max_ms"] = max(entry["max_ms"], duration_ms)
+            entry["docs_returned"] += docs
+            return True
+
+    def _record(self, key, filter_shape, sort_shape, command, duration_ms, docs):
+        with self._lock:
+            entry = self.shapes.get(key)
+            if entry is None:
+                if len(self.shapes) >= self.max_shapes:
+                    return False
+                entry = self.shapes[key] = {
+                    "shape": key,
+                    "filter": filter_shape,
+                    "sort": sort_shape,
+                    "count": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                    "docs_returned": 0,
+                    "explain": None,
+                    "last_seen": None,
+                }
+                self._capture_explain(key, command)
+            entry["count"] += 1
+            entry["total_ms"] += duration_ms
+            entry["max_ms"] = max(entry["max_ms"], duration_ms)
+            entry["docs_returned"] += docs
+            entry["last_seen"] = time.time()
+        return True
+
+    def _capture_explain(self, key, command):
+        if self._loop is None or self._db is None or command is None:
+            return
+        explainable = {k: v for k, v in command.items() if k not in DRIVER_FIELDS}
+        self._loop.call_soon_threadsafe(
+            lambda: asyncio.ensure_future(self._explain(key, explainable))
+        )
+
+    async def _explain(self, key, command):
+        try:
+            plan = await self._db.command({"explain": command, "verbosity": "queryPlanner"})
+        except Exception as e:
+            logger.error(f"Could not explain {key}: {str(e)}")
+            return
+        with self._lock:
+            if key in self.shapes:
+                self.shapes[key]["explain"] = plan
+
+    def summary(self, limit=20):
+        """Worst query shapes by total time, with suggested indexes."""
+        with self._lock:
+            entries = sorted(self.shapes.values(), key=lambda e: e["total_ms"], reverse=True)[:limit]
+            return [
+                {
+                    "shape": entry["shape"],
+                    "count": entry["count"],
+                    "total_ms": round(entry["total_ms"], 2),
+                    "avg_ms": round(entry["total_ms"] / entry["count"], 2) if entry["count"] else 0.0,
+                    "max_ms": round(entry["max_ms"], 2),
+                    "docs_returned": entry["docs_returned"],
+                    "plan_stages": sorted(set(_plan_stages(_winning_plan(entry["explain"])))) if entry["explain"] else [],
+                    "suggested_index": suggest_index(entry["filter"], entry["sort"], entry["explain"]),
+                }
+                for entry in entries
+            ]
+
+    def reset(self):
+        with self._lock:
+            self.shapes.clear()
+            self._cursors.clear()
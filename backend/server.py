@@ -3,8 +3,9 @@ from fastapi import status as http_status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
 import os
+import time
+import asyncio
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field, ConfigDict, EmailStr
@@ -16,14 +17,92 @@ import jwt
 import base64
 from geopy.geocoders import Nominatim
 from geopy.distance import geodesic
+from query_profiler import SlowQueryProfiler
+from jobs import JobQueue
+from price_index import PriceIndex, PriceMismatch
+from route_planner import plan_routes
+from archive import InquiryArchiver, parse_date_range
+from geocoding import Geocoder
+from invalidation import create_bus
+from counters import InquiryCounters
+from admission import AdmissionController, AdmissionMiddleware, RouteLimit
+from data_access import MIN_MAX_STALENESS_SECONDS, PoolMetrics, catalog_database, client_settings, create_client
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+# Operations slower than SLOW_QUERY_MS are grouped by shape for /api/admin/slow-queries
+profiler = SlowQueryProfiler(threshold_ms=float(os.environ.get('SLOW_QUERY_MS', '100')))
+# Pool sizes, timeouts and retries come from MONGO_* settings (see data_access.py)
+pool_metrics = PoolMetrics()
+client = create_client(mongo_url, os.environ, listeners=[profiler, pool_metrics])
 db = client[os.environ['DB_NAME']]
+# Public catalog and history reads may be served by secondaries with bounded staleness
+catalog_db = catalog_database(client, os.environ['DB_NAME'], os.environ)
+
+# Background jobs for follow-up work that must not delay a response
+jobs = JobQueue(
+    visibility_timeout=int(os.environ.get('JOB_VISIBILITY_TIMEOUT', '60')),
+    max_attempts=int(os.environ.get('JOB_MAX_ATTEMPTS', '5')),
+    retention=int(os.environ.get('JOB_RETENTION_SECONDS', str(7 * 86400)))
+)
+
+# Complete orders older than ARCHIVE_AFTER_DAYS move to monthly archive collections
+archiver = InquiryArchiver(
+    archive_after_days=int(os.environ.get('ARCHIVE_AFTER_DAYS', '30')),
+    batch_size=int(os.environ.get('ARCHIVE_BATCH_SIZE', '500')),
+    interval=int(os.environ.get('ARCHIVE_INTERVAL_SECONDS', '3600'))
+)
+
+# Admission control: per-route concurrency limits with bounded queues. Order
+# submission is high priority; geocoding, bcrypt and uploads are shed first.
+admission = AdmissionController(
+    global_limit=int(os.environ.get('ADMISSION_GLOBAL_LIMIT', '128')),
+    reserved=int(os.environ.get('ADMISSION_RESERVED', '32')),
+    default=RouteLimit("other /api routes", concurrency=64, queue=256, max_wait=10.0)
+)
+admission.limit("POST", "/api/inquiries", concurrency=64, queue=512, max_wait=15.0, priority="high")
+admission.limit("GET", "/api/menu/items", concurrency=48, queue=256, max_wait=5.0)
+admission.limit("GET", "/api/menu/categories", concurrency=48, queue=256, max_wait=5.0)
+admission.limit("POST", "/api/validate-delivery", concurrency=8, queue=32, max_wait=8.0, priority="low")
+admission.limit("POST", "/api/admin/login", concurrency=4, queue=16, max_wait=5.0, priority="low")
+admission.limit("POST", "/api/admin/upload-images", concurrency=4, queue=8, max_wait=10.0, priority="low")
+admission.limit("GET", "/api/admin/inquiries", concurrency=8, queue=32, max_wait=10.0, priority="low")
+admission.limit("GET", "/api/admin/delivery-routes", concurrency=2, queue=4, max_wait=10.0, priority="low")
+
+# Dashboard summary counters, kept in step with inquiry writes via $inc.
+# "Today" is a business day in BUSINESS_TIMEZONE, not a UTC day.
+counters = InquiryCounters(
+    reconcile_interval=int(os.environ.get('SUMMARY_RECONCILE_SECONDS', '3600')),
+    tz=os.environ.get('BUSINESS_TIMEZONE', 'America/New_York')
+)
+
+# Public catalog responses cached per worker; cleared on every catalog change.
+# CACHE_BUS=mongo (capped collection) or local (shared memory, single host)
+CATALOG_CACHE_MAX_ENTRIES = 256
+catalog_cache = {}
+catalog_changed_at = float('-inf')
+# Bumped on every change; a read that started before a change is not cached
+catalog_generation = 0
+# How long after a change a secondary may still serve the old catalog
+CATALOG_STALE_WINDOW = 0 if catalog_db.read_preference.mode == 0 else max(
+    catalog_db.read_preference.max_staleness, MIN_MAX_STALENESS_SECONDS
+)
+bus = create_bus(
+    os.environ.get('CACHE_BUS', 'mongo'),
+    db,
+    f"budbar_catalog_{os.environ['DB_NAME']}"
+)
+
+# Fallback coordinates for 5624 Grande River Rd, Atlanta, GA 30349
+PICKUP_COORDS = (33.6130, -84.4740)
+# A geocode job that failed for good is queued again by a delivery-routes view after this long
+GEOCODE_REQUEUE_SECONDS = int(os.environ.get('GEOCODE_REQUEUE_SECONDS', '900'))
+
+# Menu prices kept in memory so carts can be priced without database reads
+price_index = PriceIndex()
 
 # Security
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -110,6 +189,7 @@ class AdminUser(BaseModel):
 class DeliveryValidation(BaseModel):
     delivery_address: str
     cart_total: float
+    items: Optional[List[InquiryItem]] = None
 
 # Auth helpers
 def create_access_token(data: dict):
@@ -127,6 +207,96 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
     except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
+async def check_cart_prices(items: List[InquiryItem], total: float):
+    """Recompute a cart total from the price index and reject mismatches"""
+    missing = price_index.missing(items)
+    if missing:
+        # Items created since the last rebuild (rare); everything else is served from memory
+        await price_index.refresh_items(db, missing)
+    try:
+        return price_index.check_total(items, total)
+    except PriceMismatch as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def cached_catalog(key):
+    entry = catalog_cache.get(key)
+    if entry is None or entry[1] < time.monotonic():
+        return None
+    return entry
+
+def cache_catalog(key, value, generation):
+    """Cache ``value`` unless the catalog changed since ``generation`` was read."""
+    if generation != catalog_generation:
+        return value
+    if len(catalog_cache) >= CATALOG_CACHE_MAX_ENTRIES:
+        catalog_cache.clear()
+    # Reads may come from a secondary lagging up to the staleness bound, so
+    # entries cached soon after a change expire once that window has passed
+    window_end = catalog_changed_at + CATALOG_STALE_WINDOW
+    expires = window_end if window_end > time.monotonic() else float('inf')
+    catalog_cache[key] = (value, expires)
+    return value
+
+def mark_catalog_changed():
+    global catalog_changed_at, catalog_generation
+    catalog_changed_at = time.monotonic()
+    catalog_generation += 1
+    catalog_cache.clear()
+
+async def catalog_changed(scope: str):
+    """Drop this worker's catalog caches and tell the other workers to do the same"""
+    mark_catalog_changed()
+    await bus.publish(scope)
+
+@bus.subscribe
+async def on_remote_catalog_change(event: dict):
+    mark_catalog_changed()
+    await price_index.rebuild(db)
+
+def date_range_param(start_date: Optional[str], end_date: Optional[str]):
+    try:
+        return parse_date_range(start_date, end_date)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid date range: {str(e)}")
+
+def geocode_address(address: str):
+    """Blocking geocoder lookup; returns (latitude, longitude) or None"""
+    geolocator = Nominatim(user_agent="budbar_marketplace", timeout=10)
+    location = geolocator.geocode(address, exactly_one=True)
+    if not location:
+        return None
+    return (location.latitude, location.longitude)
+
+# Geocodes are cached per address and rate limited across processes to
+# Nominatim's one request per second
+geocoder = Geocoder(
+    geocode_address,
+    min_interval=float(os.environ.get('GEOCODE_MIN_INTERVAL_SECONDS', '1.0')),
+    cache_ttl=int(os.environ.get('GEOCODE_CACHE_TTL_SECONDS', str(30 * 86400)))
+)
+
+# Background jobs
+@jobs.handler("inquiry.geocode")
+async def geocode_inquiry(payload: dict):
+    """Resolve a delivery inquiry's address to coordinates for dispatch"""
+    inquiry = await db.inquiries.find_one(
+        {"id": payload["inquiry_id"]},
+        {"_id": 0, "delivery_address": 1, "delivery_coords": 1}
+    )
+    if not inquiry or inquiry.get("delivery_coords") or not inquiry.get("delivery_address"):
+        return
+    
+    # Geocoder errors propagate so the job is retried with backoff
+    coords = await geocoder.geocode(inquiry["delivery_address"])
+    if not coords:
+        logging.warning(f"Could not geocode delivery address for inquiry {payload['inquiry_id']}")
+        return
+    
+    await db.inquiries.update_one(
+        {"id": payload["inquiry_id"]},
+        {"$set": {"delivery_coords": list(coords)}}
+    )
+
 # Public endpoints
 @api_router.get("/")
 async def root():
@@ -138,6 +308,12 @@ async def get_menu_items(
     search: Optional[str] = None,
     item_type: Optional[str] = None
 ):
+    cache_key = ("items", category, search, item_type)
+    cached = cached_catalog(cache_key)
+    if cached:
+        return cached[0]
+    generation = catalog_generation
+    
     query = {}
     if category:
         query["category"] = category
@@ -150,15 +326,20 @@ async def get_menu_items(
             {"meta_details": {"$regex": search, "$options": "i"}}
         ]
     
-    items = await db.menu_items.find(query, {"_id": 0}).sort("display_order", 1).to_list(1000)
+    items = await catalog_db.menu_items.find(query, {"_id": 0}).sort("display_order", 1).to_list(1000)
     for item in items:
         if isinstance(item.get('created_at'), str):
             item['created_at'] = datetime.fromisoformat(item['created_at'])
-    return items
+    return cache_catalog(cache_key, items, generation)
 
 @api_router.get("/menu/categories")
 async def get_categories():
-    items = await db.menu_items.find({}, {"_id": 0, "categories": 1}).to_list(1000)
+    cached = cached_catalog("categories")
+    if cached:
+        return cached[0]
+    generation = catalog_generation
+    
+    items = await catalog_db.menu_items.find({}, {"_id": 0, "categories": 1}).to_list(1000)
     # Flatten all categories from all items into a single unique list
     all_categories = []
     for item in items:
@@ -167,7 +348,7 @@ async def get_categories():
     unique_categories = list(set(all_categories))
     
     # Get saved category order
-    category_order_doc = await db.category_order.find_one({}, {"_id": 0})
+    category_order_doc = await catalog_db.category_order.find_one({}, {"_id": 0})
     
     if category_order_doc and "order" in category_order_doc:
         ordered_categories = category_order_doc["order"]
@@ -181,7 +362,7 @@ async def get_categories():
         # If no order saved, return sorted alphabetically
         ordered_categories = sorted(unique_categories)
     
-    return {"categories": ordered_categories}
+    return cache_catalog("categories", {"categories": ordered_categories}, generation)
 
 @api_router.put("/admin/categories/order")
 async def update_category_order(order: dict, token: dict = Depends(verify_token)):
@@ -195,6 +376,7 @@ async def update_category_order(order: dict, token: dict = Depends(verify_token)
         upsert=True
     )
     
+    await catalog_changed("categories")
     return {"message": "Category order updated successfully"}
 
 @api_router.put("/admin/categories/{old_name}/rename")
@@ -219,6 +401,7 @@ async def rename_category(old_name: str, new_data: dict, token: dict = Depends(v
         array_filters=[{"elem": old_name}]
     )
     
+    await catalog_changed("categories")
     return {
         "message": f"Category renamed from '{old_name}' to '{new_name}'",
         "products_updated": result.modified_count
@@ -240,6 +423,7 @@ async def delete_category(category_name: str, token: dict = Depends(verify_token
         {"$pull": {"order": category_name}}
     )
     
+    await catalog_changed("categories")
     return {
         "message": f"Category '{category_name}' deleted successfully",
         "products_updated": result.modified_count
@@ -251,26 +435,22 @@ async def validate_delivery(validation: DeliveryValidation):
     # Full pickup address with city, state for accurate geocoding
     PICKUP_ADDRESS = "5624 Grande River Rd, Atlanta, GA 30349, USA"
     
+    if validation.items is not None:
+        await check_cart_prices(validation.items, validation.cart_total)
+    
     try:
-        geolocator = Nominatim(user_agent="budbar_marketplace", timeout=10)
-        
-        # Geocode pickup address with more specific query
-        pickup_location = geolocator.geocode(PICKUP_ADDRESS, exactly_one=True)
-        
-        # Geocode delivery address
-        delivery_location = geolocator.geocode(validation.delivery_address, exactly_one=True)
+        # Geocode pickup address (with a more specific query) and delivery address
+        pickup_coords, delivery_coords = await asyncio.gather(
+            geocoder.geocode(PICKUP_ADDRESS),
+            geocoder.geocode(validation.delivery_address)
+        )
         
-        if not delivery_location:
+        if not delivery_coords:
             raise HTTPException(status_code=400, detail="Could not find delivery address. Please enter a valid address.")
         
-        if not pickup_location:
-            # Fallback coordinates for 5624 Grande River Rd, Atlanta, GA 30349
-            pickup_coords = (33.6130, -84.4740)
+        if not pickup_coords:
+            pickup_coords = PICKUP_COORDS
             logging.warning("Using fallback coordinates for pickup address")
-        else:
-            pickup_coords = (pickup_location.latitude, pickup_location.longitude)
-        
-        delivery_coords = (delivery_location.latitude, delivery_location.longitude)
         
         # Calculate distance in miles (geodesic - as the crow flies)
         distance = geodesic(pickup_coords, delivery_coords).miles
@@ -306,20 +486,48 @@ async def validate_delivery(validation: DeliveryValidation):
 
 @api_router.post("/inquiries", response_model=Inquiry)
 async def create_inquiry(inquiry_data: InquiryCreate):
+    await check_cart_prices(inquiry_data.items, inquiry_data.total)
+    
     inquiry = Inquiry(**inquiry_data.model_dump())
     doc = inquiry.model_dump()
     doc['created_at'] = doc['created_at'].isoformat()
     
     await db.inquiries.insert_one(doc)
+    await counters.inquiry_created(doc)
+    
+    # Follow-up work runs in the job workers, not in this request. The order is
+    # already stored, so a failed enqueue must not fail the request (a retry
+    # would duplicate the order); the delivery-routes view re-enqueues it.
+    if inquiry.delivery_method == "delivery" and inquiry.delivery_address:
+        try:
+            await jobs.enqueue(
+                "inquiry.geocode",
+                {"inquiry_id": inquiry.id},
+                idempotency_key=f"inquiry.geocode:{inquiry.id}"
+            )
+        except Exception as e:
+            logging.error(f"Could not enqueue geocoding for inquiry {inquiry.id}: {str(e)}")
     return inquiry
 
 @api_router.get("/inquiries/history", response_model=List[Inquiry])
-async def get_order_history(first_name: str, phone_number: str):
+async def get_order_history(
+    first_name: str,
+    phone_number: str,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None
+):
     """Get order history for a customer by first name and phone number"""
-    inquiries = await db.inquiries.find({
+    query = {
         "first_name": {"$regex": f"^{first_name}$", "$options": "i"},  # Case insensitive exact match
         "phone_number": phone_number
-    }, {"_id": 0}).sort("created_at", -1).to_list(100)  # Limit to 100 most recent
+    }
+    date_range = date_range_param(start_date, end_date)
+    if date_range:
+        # Archived orders are only read when the range asks for them
+        inquiries = await archiver.find(query, date_range, limit=100, db=catalog_db)
+    else:
+        # 100 most recent, including archived orders for customers with few recent ones
+        inquiries = await archiver.recent(query, limit=100, db=catalog_db)
     
     for inquiry in inquiries:
         if isinstance(inquiry.get('created_at'), str):
@@ -332,7 +540,8 @@ async def get_order_history(first_name: str, phone_number: str):
 async def admin_login(credentials: AdminLogin):
     admin = await db.admin_users.find_one({"email": credentials.email}, {"_id": 0})
     
-    if not admin or not pwd_context.verify(credentials.password, admin["password_hash"]):
+    # bcrypt is deliberately slow; keep it off the event loop
+    if not admin or not await asyncio.to_thread(pwd_context.verify, credentials.password, admin["password_hash"]):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
     token = create_access_token({"email": admin["email"], "id": admin["id"]})
@@ -357,6 +566,8 @@ async def create_menu_item(item_data: MenuItemCreate, token: dict = Depends(veri
     doc['created_at'] = doc['created_at'].isoformat()
     
     await db.menu_items.insert_one(doc)
+    price_index.update_item(menu_item.id, doc['variants'], menu_item.discount)
+    await catalog_changed("menu")
     return menu_item
 
 @api_router.put("/admin/menu/items/{item_id}")
@@ -369,6 +580,8 @@ async def update_menu_item(item_id: str, item_data: MenuItemCreate, token: dict
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Item not found")
     
+    price_index.update_item(item_id, item_data.model_dump()['variants'], item_data.discount)
+    await catalog_changed("menu")
     return {"message": "Item updated successfully"}
 
 @api_router.delete("/admin/menu/items/{item_id}")
@@ -378,29 +591,118 @@ async def delete_menu_item(item_id: str, token: dict = Depends(verify_token)):
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Item not found")
     
+    price_index.remove_item(item_id)
+    await catalog_changed("menu")
     return {"message": "Item deleted successfully"}
 
-@api_router.get("/inquiries/history", response_model=List[Inquiry])
-async def get_order_history(first_name: str, phone_number: str):
-    """Get order history for a customer by first name and phone number"""
-    inquiries = await db.inquiries.find({
-        "first_name": {"$regex": f"^{first_name}$", "$options": "i"},  # Case insensitive exact match
-        "phone_number": phone_number
-    }, {"_id": 0}).sort("created_at", -1).to_list(100)  # Limit to 100 most recent
-    
+@api_router.get("/admin/inquiries", response_model=List[Inquiry])
+async def get_inquiries(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    token: dict = Depends(verify_token)
+):
+    date_range = date_range_param(start_date, end_date)
+    if date_range:
+        inquiries = await archiver.find({}, date_range)
+    else:
+        inquiries = await db.inquiries.find({}, {"_id": 0}).sort("created_at", -1).to_list(1000)
     for inquiry in inquiries:
         if isinstance(inquiry.get('created_at'), str):
             inquiry['created_at'] = datetime.fromisoformat(inquiry['created_at'])
-    
     return inquiries
 
-@api_router.get("/admin/inquiries", response_model=List[Inquiry])
-async def get_inquiries(token: dict = Depends(verify_token)):
-    inquiries = await db.inquiries.find({}, {"_id": 0}).sort("created_at", -1).to_list(1000)
+@api_router.get("/admin/admission")
+async def get_admission_stats(token: dict = Depends(verify_token)):
+    """Per-route concurrency, queue depth and shed counts"""
+    return admission.stats()
+
+@api_router.get("/admin/summary")
+async def get_summary(token: dict = Depends(verify_token)):
+    """Order counts and revenue for the dashboard header, read from counter documents"""
+    return await counters.summary()
+
+@api_router.post("/admin/summary/reconcile")
+async def reconcile_summary(token: dict = Depends(verify_token)):
+    """Recompute the summary counters from every stored inquiry"""
+    await counters.reconcile()
+    return await counters.summary()
+
+@api_router.post("/admin/inquiries/archive")
+async def archive_inquiries(token: dict = Depends(verify_token)):
+    """Run an archival pass now instead of waiting for the background loop"""
+    archived = await archiver.run_pass()
+    return {"archived": archived, "archive_after_days": archiver.archive_after_days}
+
+@api_router.get("/admin/delivery-routes")
+async def get_delivery_routes(
+    drivers: int = 1,
+    max_stops: Optional[int] = None,
+    token: dict = Depends(verify_token)
+):
+    """Plan stop orders per driver for pending delivery inquiries"""
+    if drivers < 1 or (max_stops is not None and max_stops < 1):
+        raise HTTPException(status_code=400, detail="drivers and max_stops must be at least 1")
+    
+    inquiries = await db.inquiries.find(
+        {"status": "pending", "delivery_method": "delivery"},
+        {"_id": 0, "id": 1, "first_name": 1, "phone_number": 1, "delivery_address": 1, "delivery_coords": 1, "total": 1}
+    ).sort("created_at", 1).to_list(1000)
+    
+    # Reuse coordinates already resolved for the same address by another order
+    known = {
+        inquiry["delivery_address"].strip().lower(): inquiry["delivery_coords"]
+        for inquiry in inquiries
+        if inquiry.get("delivery_coords") and inquiry.get("delivery_address")
+    }
+    stops = []
+    unlocated = []
+    to_geocode = []
     for inquiry in inquiries:
-        if isinstance(inquiry.get('created_at'), str):
-            inquiry['created_at'] = datetime.fromisoformat(inquiry['created_at'])
-    return inquiries
+        address = (inquiry.get("delivery_address") or "").strip().lower()
+        coords = inquiry.get("delivery_coords") or known.get(address)
+        if coords:
+            stops.append((inquiry["id"], tuple(coords)))
+        else:
+            unlocated.append(inquiry["id"])
+            if address:
+                to_geocode.append(({"inquiry_id": inquiry["id"]}, f"inquiry.geocode:{inquiry['id']}"))
+    
+    # Never geocode inline; the jobs fill delivery_coords for the next plan.
+    # One bulk upsert; inquiries that already have a job are left alone unless
+    # it failed (e.g. during a geocoder outage) long enough ago to try again.
+    try:
+        await jobs.enqueue_many("inquiry.geocode", to_geocode, requeue_failed_after=GEOCODE_REQUEUE_SECONDS)
+    except Exception as e:
+        logging.error(f"Could not enqueue geocoding for unlocated deliveries: {str(e)}")
+    
+    routes = await asyncio.to_thread(plan_routes, PICKUP_COORDS, stops, drivers, max_stops)
+    
+    by_id = {inquiry["id"]: inquiry for inquiry in inquiries}
+    coords_by_id = dict(stops)
+    return {
+        "pickup": list(PICKUP_COORDS),
+        "routes": [
+            {
+                "driver": number,
+                "distance_miles": route["distance_miles"],
+                "return_miles": route["return_miles"],
+                "stops": [
+                    {
+                        "inquiry_id": inquiry_id,
+                        "first_name": by_id[inquiry_id]["first_name"],
+                        "phone_number": by_id[inquiry_id]["phone_number"],
+                        "delivery_address": by_id[inquiry_id]["delivery_address"],
+                        "total": by_id[inquiry_id]["total"],
+                        "coords": list(coords_by_id[inquiry_id]),
+                        "leg_miles": leg
+                    }
+                    for inquiry_id, leg in zip(route["stops"], route["leg_miles"])
+                ]
+            }
+            for number, route in enumerate(routes, start=1)
+        ],
+        "unlocated": unlocated
+    }
 
 @api_router.put("/admin/inquiries/{inquiry_id}/status")
 async def update_inquiry_status(
@@ -414,23 +716,30 @@ async def update_inquiry_status(
     if status not in ["pending", "complete"]:
         raise HTTPException(status_code=400, detail="Invalid status. Must be 'pending' or 'complete'")
     
-    result = await db.inquiries.update_one(
+    # The previous status tells the counters which way to move
+    before = await db.inquiries.find_one_and_update(
         {"id": inquiry_id},
-        {"$set": {"status": status}}
+        {"$set": {"status": status}},
+        projection={"_id": 0, "status": 1, "created_at": 1}
     )
     
-    if result.matched_count == 0:
+    if before is None:
         raise HTTPException(status_code=404, detail="Inquiry not found")
     
+    await counters.status_changed(before, status)
     return {"message": "Status updated successfully", "status": status}
 
 @api_router.delete("/admin/inquiries/{inquiry_id}")
 async def delete_inquiry(inquiry_id: str, token: dict = Depends(verify_token)):
-    result = await db.inquiries.delete_one({"id": inquiry_id})
+    deleted = await db.inquiries.find_one_and_delete(
+        {"id": inquiry_id},
+        projection={"_id": 0, "status": 1, "total": 1, "created_at": 1}
+    )
     
-    if result.deleted_count == 0:
+    if deleted is None:
         raise HTTPException(status_code=404, detail="Inquiry not found")
     
+    await counters.inquiry_deleted(deleted)
     return {"message": "Inquiry deleted successfully"}
 
 @api_router.put("/admin/menu/reorder")
@@ -441,11 +750,49 @@ async def reorder_menu_items(order_updates: List[dict], token: dict = Depends(ve
             {"id": update["id"]},
             {"$set": {"display_order": update["display_order"]}}
         )
+    await catalog_changed("menu")
     return {"message": "Menu order updated successfully"}
 
+@api_router.get("/admin/slow-queries")
+async def get_slow_queries(limit: int = 20, token: dict = Depends(verify_token)):
+    """Summarize the slowest query shapes with suggested indexes"""
+    return {
+        "threshold_ms": profiler.threshold_ms,
+        "queries": profiler.summary(limit)
+    }
+
+@api_router.get("/admin/db-pool")
+async def get_db_pool(token: dict = Depends(verify_token)):
+    """Connection pool settings, checkout wait times and catalog read routing"""
+    return {
+        "settings": client_settings(os.environ),
+        "catalog_read_preference": catalog_db.read_preference.document,
+        **pool_metrics.snapshot()
+    }
+
+@api_router.delete("/admin/slow-queries")
+async def reset_slow_queries(token: dict = Depends(verify_token)):
+    profiler.reset()
+    return {"message": "Slow query statistics cleared"}
+
 # Initialize admin user on startup
 @app.on_event("startup")
 async def startup_event():
+    profiler.attach(asyncio.get_running_loop(), db)
+    await bus.start()
+    await price_index.rebuild(db)
+    archiver.bind(db)
+    await archiver.ensure_indexes()
+    archiver.start()
+    counters.bind(db)
+    counters.start()
+    geocoder.bind(db)
+    await geocoder.ensure_indexes()
+    jobs.bind(db)
+    await jobs.ensure_indexes()
+    # Set JOB_WORKERS=0 when running worker.py as a separate process
+    jobs.start(int(os.environ.get('JOB_WORKERS', '1')))
+
     # Update or create default admin with new password
     admin_exists = await db.admin_users.find_one({"email": "admin@purepath.com"})
     if admin_exists:
@@ -468,6 +815,10 @@ async def startup_event():
 
 app.include_router(api_router)
 
+# Added before CORS so CORS stays outermost and 503s still carry CORS headers
+if os.environ.get('ADMISSION_CONTROL', '1') != '0':
+    app.add_middleware(AdmissionMiddleware, controller=admission)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
@@ -484,4 +835,8 @@ logger = logging.getLogger(__name__)
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    await jobs.stop()
+    await archiver.stop()
+    await counters.stop()
+    await bus.stop()
     client.close()
\ No newline at end of file
@@ -0,0 +1,33 @@
+"""Standalone job worker.
+
+Runs the job queue outside the web process. Start the API with
+``JOB_WORKERS=0`` and run one or more of these instead:
+
+    python worker.py --workers 4
+"""
+import argparse
+import asyncio
+import logging
+import signal
+
+from server import db, geocoder, jobs
+
+
+async def main(workers):
+    geocoder.bind(db)
+    await geocoder.ensure_indexes()
+    jobs.bind(db)
+    await jobs.ensure_indexes()
+    jobs.start(workers)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, jobs.request_stop)
+    await jobs.run_forever()
+    logging.info("Job worker stopped")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run background job workers")
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+    asyncio.run(main(args.workers))
@@ -0,0 +1,548 @@
+"""In-memory stand-in for the parts of Motor that server.py uses.
+
+It is not a database. It implements only enough of the query and update
+languages for the backend to run without a mongod. Reads copy documents the
+way a driver would, so handlers can mutate results freely.
+
+Every operation yields to the event loop first, as a network round trip
+would, so concurrent requests interleave instead of running back to back.
+Set ``FakeCollection.latency`` (seconds) to simulate the round-trip time.
+"""
+import asyncio
+import copy
+import itertools
+import re
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from zoneinfo import ZoneInfo
+from pymongo.errors import DuplicateKeyError
+
+_MISSING = object()
+_regex_cache = {}
+
+
+def _compile(pattern, options=""):
+    key = (pattern, options)
+    if key not in _regex_cache:
+        flags = re.IGNORECASE if "i" in options else 0
+        if "m" in options:
+            flags |= re.MULTILINE
+        _regex_cache[key] = re.compile(pattern, flags)
+    return _regex_cache[key]
+
+
+def _get(doc, path):
+    value = doc
+    for part in path.split("."):
+        if isinstance(value, dict):
+            value = value.get(part, _MISSING)
+        elif isinstance(value, list) and part.isdigit():
+            index = int(part)
+            value = value[index] if index < len(value) else _MISSING
+        else:
+            return _MISSING
+        if value is _MISSING:
+            return _MISSING
+    return value
+
+
+def _compare(left, right, op):
+    try:
+        return op(left, right)
+    except TypeError:
+        return False
+
+
+def _match_operator(value, operator, operand, condition):
+    candidates = value if isinstance(value, list) else [value]
+    if operator == "$eq":
+        return _match_value(value, operand)
+    if operator == "$ne":
+        return not _match_value(value, operand)
+    if operator == "$in":
+        return any(_match_value(value, item) for item in operand)
+    if operator == "$nin":
+        return not any(_match_value(value, item) for item in operand)
+    if operator == "$exists":
+        return (value is not _MISSING) == bool(operand)
+    if operator == "$regex":
+        regex = operand if hasattr(operand, "search") else _compile(operand, condition.get("$options", ""))
+        return any(isinstance(item, str) and regex.search(item) for item in candidates)
+    if operator == "$options":
+        return True
+    comparisons = {
+        "$gt": lambda a, b: a > b,
+        "$gte": lambda a, b: a >= b,
+        "$lt": lambda a, b: a < b,
+        "$lte": lambda a, b: a <= b,
+    }
+    if operator in comparisons:
+        return any(item is not _MISSING and _compare(item, operand, comparisons[operator]) for item in candidates)
+    raise NotImplementedError(f"Unsupported query operator {operator}")
+
+
+def _match_value(value, expected):
+    if isinstance(value, list) and not isinstance(expected, list):
+        return expected in value
+    if value is _MISSING:
+        return expected is None
+    return value == expected
+
+
+def _is_operator_dict(condition):
+    return isinstance(condition, dict) and condition and all(key.startswith("$") for key in condition)
+
+
+def matches(doc, query):
+    for key, condition in (query or {}).items():
+        if key == "$or":
+            if not any(matches(doc, clause) for clause in condition):
+                return False
+        elif key == "$and":
+            if not all(matches(doc, clause) for clause in condition):
+                return False
+        elif key == "$nor":
+            if any(matches(doc, clause) for clause in condition):
+                return False
+        else:
+            value = _get(doc, key)
+            if _is_operator_dict(condition):
+                if not all(_match_operator(value, op, operand, condition) for op, operand in condition.items()):
+                    return False
+            elif not _match_value(value, condition):
+                return False
+    return True
+
+
+def _project(doc, projection):
+    doc = copy.deepcopy(doc)
+    if not projection:
+        return doc
+    included = [key for key, flag in projection.items() if flag and key != "_id"]
+    if included:
+        result = {key: doc[key] for key in included if key in doc}
+        if projection.get("_id", 1) and "_id" in doc:
+            result["_id"] = doc["_id"]
+        return result
+    for key, flag in projection.items():
+        if not flag:
+            doc.pop(key, None)
+    return doc
+
+
+def _sort_key(direction):
+    # Missing values sort first, mixed types sort by type name
+    def key(value):
+        if value is _MISSING or value is None:
+            return (0, "", 0)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return (1, "", value)
+        return (2, type(value).__name__, value)
+    return key
+
+
+def _sort(docs, spec):
+    for field, direction in reversed(spec):
+        key = _sort_key(direction)
+        docs.sort(key=lambda doc: key(_get(doc, field)), reverse=direction == -1)
+    return docs
+
+
+def _normalize_sort(key_or_list, direction=None):
+    if key_or_list is None:
+        return []
+    if isinstance(key_or_list, str):
+        return [(key_or_list, direction or 1)]
+    if isinstance(key_or_list, dict):
+        return list(key_or_list.items())
+    return list(key_or_list)
+
+
+def _set_path(doc, path, value, array_filters):
+    parts = path.split(".")
+    targets = [doc]
+    for index, part in enumerate(parts):
+        last = index == len(parts) - 1
+        next_targets = []
+        for target in targets:
+            if part.startswith("$[") and part.endswith("]"):
+                identifier = part[2:-1]
+                condition = next(f[identifier] for f in array_filters if identifier in f)
+                for i, item in enumerate(target):
+                    if _is_operator_dict(condition):
+                        hit = all(_match_operator(item, op, operand, condition) for op, operand in condition.items())
+                    else:
+                        hit = item == condition
+                    if hit:
+                        if last:
+                            target[i] = copy.deepcopy(value)
+                        else:
+                            next_targets.append(item)
+            elif last:
+                target[part] = copy.deepcopy(value)
+            else:
+                next_targets.append(target.setdefault(part, {}))
+        targets = next_targets
+
+
+def _apply_update(doc, update, array_filters=None, inserting=False):
+    if not any(key.startswith("$") for key in update):
+        preserved = doc.get("_id")
+        doc.clear()
+        doc.update(copy.deepcopy(update))
+        if preserved is not None:
+            doc["_id"] = preserved
+        return
+    for operator, fields in update.items():
+        for path, value in fields.items():
+            if operator == "$set":
+                _set_path(doc, path, value, array_filters or [])
+            elif operator == "$setOnInsert":
+                if inserting:
+                    _set_path(doc, path, value, [])
+            elif operator == "$unset":
+                parent = _get(doc, path.rpartition(".")[0]) if "." in path else doc
+                if isinstance(parent, dict):
+                    parent.pop(path.rpartition(".")[2], None)
+            elif operator == "$inc":
+                current = _get(doc, path)
+                _set_path(doc, path, (0 if current is _MISSING else current) + value, [])
+            elif operator in ("$max", "$min"):
+                current = _get(doc, path)
+                better = max if operator == "$max" else min
+                _set_path(doc, path, value if current is _MISSING else better(current, value), [])
+            elif operator == "$push":
+                current = _get(doc, path)
+                items = list(current) if isinstance(current, list) else []
+                items.extend(value["$each"] if isinstance(value, dict) and "$each" in value else [value])
+                _set_path(doc, path, items, [])
+            elif operator == "$pull":
+                current = _get(doc, path)
+                if isinstance(current, list):
+                    if _is_operator_dict(value):
+                        kept = [item for item in current
+                                if not all(_match_operator(item, op, operand, value) for op, operand in value.items())]
+                    elif isinstance(value, dict):
+                        kept = [item for item in current if not (isinstance(item, dict) and matches(item, value))]
+                    else:
+                        kept = [item for item in current if item != value]
+                    _set_path(doc, path, kept, [])
+            else:
+                raise NotImplementedError(f"Unsupported update operator {operator}")
+
+
+def _upsert_seed(query):
+    seed = {}
+    for key, condition in (query or {}).items():
+        if not key.startswith("$") and not _is_operator_dict(condition):
+            _set_path(seed, key, condition, [])
+    return seed
+
+
+def _evaluate(expression, doc):
+    if isinstance(expression, str) and expression.startswith("$"):
+        value = _get(doc, expression[1:])
+        return None if value is _MISSING else value
+    if isinstance(expression, dict) and len(expression) == 1:
+        operator, args = next(iter(expression.items()))
+        if operator == "$substrBytes":
+            value, start, length = (_evaluate(arg, doc) for arg in args)
+            return (value or "")[start:start + length]
+        if operator == "$cond":
+            condition, then, otherwise = args
+            return _evaluate(then if _evaluate(condition, doc) else otherwise, doc)
+        if operator == "$eq":
+            return _evaluate(args[0], doc) == _evaluate(args[1], doc)
+        if operator == "$dateFromString":
+            parsed = datetime.fromisoformat(_evaluate(args["dateString"], doc))
+            return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+        if operator == "$dateToString":
+            date = _evaluate(args["date"], doc)
+            return date.astimezone(ZoneInfo(args.get("timezone", "UTC"))).strftime(args["format"])
+        raise NotImplementedError(f"Unsupported expression {operator}")
+    return expression
+
+
+def _group(docs, spec):
+    groups = {}
+    for doc in docs:
+        key = _evaluate(spec["_id"], doc)
+        group = groups.setdefault(repr(key), {"_id": key})
+        for field, accumulator in spec.items():
+            if field == "_id":
+                continue
+            operator, expression = next(iter(accumulator.items()))
+            if operator != "$sum":
+                raise NotImplementedError(f"Unsupported accumulator {operator}")
+            group[field] = group.get(field, 0) + (_evaluate(expression, doc) or 0)
+    return list(groups.values())
+
+
+class FakeAggregateCursor:
+    def __init__(self, docs):
+        self._docs = docs
+
+    async def to_list(self, length=None):
+        await _round_trip()
+        return self._docs[:length] if length else self._docs
+
+
+class FakeCursor:
+    def __init__(self, collection, query, projection):
+        self._collection = collection
+        self._query = query
+        self._projection = projection
+        self._sort = []
+        self._skip = 0
+        self._limit = 0
+
+    def sort(self, key_or_list, direction=None):
+        self._sort = _normalize_sort(key_or_list, direction)
+        return self
+
+    def skip(self, count):
+        self._skip = count
+        return self
+
+    def limit(self, count):
+        self._limit = count
+        return self
+
+    def _results(self, length=None):
+        docs = [doc for doc in self._collection._docs if matches(doc, self._query)]
+        if self._sort:
+            docs = _sort(docs, self._sort)
+        docs = docs[self._skip:]
+        bounds = [n for n in (self._limit, length) if n]
+        if bounds:
+            docs = docs[:min(bounds)]
+        return [_project(doc, self._projection) for doc in docs]
+
+    async def to_list(self, length=None):
+        await _round_trip()
+        return self._results(length)
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        await _round_trip()
+        for doc in self._results():
+            yield doc
+
+
+async def _round_trip():
+    await asyncio.sleep(FakeCollection.latency)
+
+
+class FakeCollection:
+    _ids = itertools.count(1)
+    latency = 0.0
+
+    def __init__(self, name):
+        self.name = name
+        self._docs = []
+        self._id_index = set()
+
+    def find(self, filter=None, projection=None, sort=None, limit=0, skip=0):
+        cursor = FakeCursor(self, filter or {}, projection)
+        if sort:
+            cursor.sort(sort)
+        return cursor.skip(skip).limit(limit)
+
+    def _first(self, filter, sort=None):
+        docs = [doc for doc in self._docs if matches(doc, filter)]
+        if sort:
+            docs = _sort(docs, _normalize_sort(sort))
+        return docs[0] if docs else None
+
+    async def find_one(self, filter=None, projection=None, sort=None):
+        await _round_trip()
+        doc = self._first(filter or {}, sort)
+        return _project(doc, projection) if doc is not None else None
+
+    async def count_documents(self, filter=None, **kwargs):
+        await _round_trip()
+        return sum(1 for doc in self._docs if matches(doc, filter or {}))
+
+    async def estimated_document_count(self):
+        await _round_trip()
+        return len(self._docs)
+
+    async def distinct(self, key, filter=None):
+        await _round_trip()
+        values = []
+        for doc in self._docs:
+            if matches(doc, filter or {}):
+                value = _get(doc, key)
+                for item in value if isinstance(value, list) else [value]:
+                    if item is not _MISSING and item not in values:
+                        values.append(item)
+        return values
+
+    def _insert(self, doc):
+        doc = copy.deepcopy(doc)
+        doc.setdefault("_id", next(self._ids))
+        if doc["_id"] in self._id_index:
+            raise DuplicateKeyError(f"E11000 duplicate key error collection: {self.name} dup key: {{ _id: {doc['_id']!r} }}", 11000)
+        self._id_index.add(doc["_id"])
+        self._docs.append(doc)
+        return doc["_id"]
+
+    async def insert_one(self, doc, **kwargs):
+        await _round_trip()
+        return SimpleNamespace(inserted_id=self._insert(doc), acknowledged=True)
+
+    async def insert_many(self, docs, **kwargs):
+        await _round_trip()
+        return SimpleNamespace(inserted_ids=[self._insert(doc) for doc in docs], acknowledged=True)
+
+    def _update(self, filter, update, upsert, array_filters, many):
+        matched = [doc for doc in self._docs if matches(doc, filter)]
+        if not many:
+            matched = matched[:1]
+        modified = 0
+        for doc in matched:
+            before = copy.deepcopy(doc)
+            _apply_update(doc, update, array_filters)
+            modified += doc != before
+        upserted_id = None
+        if not matched and upsert:
+            doc = _upsert_seed(filter)
+            _apply_update(doc, update, array_filters, inserting=True)
+            upserted_id = self._insert(doc)
+        return SimpleNamespace(
+            matched_count=len(matched), modified_count=modified,
+            upserted_id=upserted_id, acknowledged=True
+        )
+
+    async def update_one(self, filter, update, upsert=False, array_filters=None, **kwargs):
+        await _round_trip()
+        return self._update(filter, update, upsert, array_filters, many=False)
+
+    async def update_many(self, filter, update, upsert=False, array_filters=None, **kwargs):
+        await _round_trip()
+        return self._update(filter, update, upsert, array_filters, many=True)
+
+    async def replace_one(self, filter, replacement, upsert=False, **kwargs):
+        await _round_trip()
+        return self._update(filter, replacement, upsert, None, many=False)
+
+    def _delete(self, filter, many):
+        deleted = 0
+        kept = []
+        for doc in self._docs:
+            if (many or not deleted) and matches(doc, filter):
+                deleted += 1
+                self._id_index.discard(doc["_id"])
+            else:
+                kept.append(doc)
+        self._docs = kept
+        return SimpleNamespace(deleted_count=deleted, acknowledged=True)
+
+    async def delete_one(self, filter, **kwargs):
+        await _round_trip()
+        return self._delete(filter, many=False)
+
+    async def delete_many(self, filter, **kwargs):
+        await _round_trip()
+        return self._delete(filter, many=True)
+
+    async def bulk_write(self, requests, ordered=True, **kwargs):
+        await _round_trip()
+        upserted = matched = modified = 0
+        for request in requests:
+            # pymongo's UpdateOne keeps its arguments in private attributes
+            result = self._update(request._filter, request._doc, request._upsert,
+                                  request._array_filters, many=False)
+            matched += result.matched_count
+            modified += result.modified_count
+            upserted += result.upserted_id is not None
+        return SimpleNamespace(
+            matched_count=matched, modified_count=modified,
+            upserted_count=upserted, acknowledged=True
+        )
+
+    async def find_one_and_update(self, filter, update, projection=None, sort=None,
+                                  upsert=False, return_document=False, array_filters=None, **kwargs):
+        await _round_trip()
+        doc = self._first(filter, sort)
+        before = copy.deepcopy(doc)
+        if doc is None:
+            if not upsert:
+                return None
+            doc = _upsert_seed(filter)
+            _apply_update(doc, update, array_filters, inserting=True)
+            self._insert(doc)
+            doc = self._docs[-1]
+        else:
+            _apply_update(doc, update, array_filters)
+        # ReturnDocument.AFTER is True, BEFORE is False
+        result = doc if return_document else before
+        return _project(result, projection) if result is not None else None
+
+    async def find_one_and_delete(self, filter, projection=None, sort=None, **kwargs):
+        await _round_trip()
+        doc = self._first(filter, sort)
+        if doc is None:
+            return None
+        self._docs = [d for d in self._docs if d is not doc]
+        self._id_index.discard(doc["_id"])
+        return _project(doc, projection)
+
+    def aggregate(self, pipeline, **kwargs):
+        docs = list(self._docs)
+        for stage in pipeline:
+            operator, spec = next(iter(stage.items()))
+            if operator == "$match":
+                docs = [doc for doc in docs if matches(doc, spec)]
+            elif operator == "$group":
+                docs = _group(docs, spec)
+            elif operator == "$sort":
+                docs = _sort(docs, _normalize_sort(spec))
+            elif operator == "$limit":
+                docs = docs[:spec]
+            else:
+                raise NotImplementedError(f"Unsupported pipeline stage {operator}")
+        return FakeAggregateCursor(copy.deepcopy(docs))
+
+    async def create_index(self, keys, **kwargs):
+        await _round_trip()
+        return "_".join(f"{k}_{d}" for k, d in _normalize_sort(keys))
+
+    async def drop(self):
+        await _round_trip()
+        self._docs = []
+        self._id_index = set()
+
+
+class FakeDatabase:
+    def __init__(self, name="bench"):
+        self.name = name
+        self._collections = {}
+
+    def __getitem__(self, name):
+        if name not in self._collections:
+            self._collections[name] = FakeCollection(name)
+        return self._collections[name]
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    def get_collection(self, name, **kwargs):
+        return self[name]
+
+    async def list_collection_names(self, filter=None):
+        await _round_trip()
+        names = [name for name, coll in self._collections.items() if coll._docs]
+        if filter:
+            names = [name for name in names if matches({"name": name}, filter)]
+        return names
+
+    async def command(self, command, *args, **kwargs):
+        await _round_trip()
+        if isinstance(command, dict) and "explain" in command:
+            return {"queryPlanner": {"winningPlan": {"stage": "COLLSCAN"}}}
+        return {"ok": 1.0}
@@ -0,0 +1,609 @@
+"""Local load/benchmark suite for every API route.
+
+Runs the FastAPI app in-process (requests are driven straight through ASGI, so
+no network or uvicorn is involved) against an in-memory Mongo stand-in and a
+fake geocoder, seeds it at a configurable size, and reports req/s and
+p50/p95/p99 latency per route. Each route is warmed up, then measured once per
+pass, and reports the median of its passes. Results are compared against a
+stored baseline, scaled to the machine speed the baseline was recorded at, and
+the run fails when a route regresses past the threshold by more than an
+absolute noise floor, and still does after its passes are repeated.
+
+    python benchmarks/run.py --profile medium
+    python benchmarks/run.py --profile large --update-baseline          # record new routes only
+    python benchmarks/run.py --route /api/menu --rebaseline             # overwrite existing entries
+    python benchmarks/run.py --mongo-url mongodb://localhost:27017   # real local mongod
+"""
+import argparse
+import asyncio
+import gc
+import hashlib
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+
+ROOT_DIR = Path(__file__).parent
+sys.path.insert(0, str(ROOT_DIR.parent / "backend"))
+sys.path.insert(0, str(ROOT_DIR))
+
+from fake_mongo import FakeCollection, FakeDatabase  # noqa: E402
+
+BASELINE_PATH = ROOT_DIR / "baseline.json"
+
+# (menu items, inquiries) seeded for each profile
+PROFILES = {
+    "small": (100, 1000),
+    "medium": (1000, 10000),
+    "large": (10000, 100000),
+}
+
+CATEGORIES = ["Relax", "Focus", "Sleep", "Energy", "Social", "Classic", "Seasonal", "Limited"]
+FIRST_NAMES = ["Ava", "Ben", "Cara", "Dev", "Eli", "Fay", "Gus", "Hana", "Ivan", "Jo"]
+PICKUP_COORDS = (33.6130, -84.4740)
+# The oldest share of seeded orders is spread over months before the archive
+# cutoff, so every profile has cold partitions for ?range reads to touch
+ARCHIVED_SHARE = 0.2
+
+
+def fake_coords(address):
+    """Deterministic coordinates within ~60 miles of the pickup point, or None for 'nowhere'."""
+    if not address or "nowhere" in address.lower():
+        return None
+    digest = hashlib.sha1(address.lower().encode()).digest()
+    return (PICKUP_COORDS[0] + (digest[0] - 128) / 128 * 0.8,
+            PICKUP_COORDS[1] + (digest[1] - 128) / 128 * 0.8)
+
+
+class FakeNominatim:
+    """Geocoder stand-in backed by ``fake_coords``."""
+
+    latency = 0.0
+
+    def __init__(self, user_agent=None, timeout=None, **kwargs):
+        pass
+
+    def geocode(self, query, exactly_one=True, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)  # geopy is blocking, so is the fake
+        coords = fake_coords(query)
+        if coords is None:
+            return None
+        return SimpleNamespace(latitude=coords[0], longitude=coords[1], address=query)
+
+
+def make_menu_item(index, rng):
+    variants = [
+        {"name": name, "price": round(rng.uniform(10, 120), 2)}
+        for name in ["1g", "3.5g", "7g", "14g", "28g"][:rng.randint(1, 5)]
+    ]
+    return {
+        "id": str(uuid.uuid4()),
+        "title": f"{rng.choice(['Wake Up', 'Night Cap', 'Golden', 'Green'])} Blend {index}",
+        "description": f"House blend number {index} with a smooth finish",
+        "categories": rng.sample(CATEGORIES, rng.randint(1, 3)),
+        "item_type": rng.choice(["blends", "buds"]),
+        "event": "",
+        "meta_details": f"terpene-{index % 17} lot-{index}",
+        "images": [],
+        "variants": variants,
+        "discount": rng.choice([0.0, 0.0, 0.0, 10.0, 15.0]),
+        "display_order": index,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+def seeded_age(index, count):
+    """Age of the ``index``-th newest of ``count`` seeded orders."""
+    archived = int(count * ARCHIVED_SHARE)
+    recent = count - archived
+    if index < recent:
+        return timedelta(minutes=index * 5)
+    start = max(timedelta(days=31), timedelta(minutes=recent * 5))
+    return start + timedelta(days=180) * (index - recent) / archived
+
+
+def make_inquiry(index, menu_items, rng, now, age):
+    items = []
+    for item in rng.sample(menu_items, min(len(menu_items), rng.randint(1, 4))):
+        variant = rng.choice(item["variants"])
+        items.append({
+            "menu_item_id": item["id"],
+            "title": item["title"],
+            "variant_name": variant["name"],
+            "variant_price": variant["price"],
+            "quantity": rng.randint(1, 3),
+            "discount": item["discount"],
+        })
+    total = sum(i["variant_price"] * i["quantity"] * (1 - i["discount"] / 100) for i in items)
+    delivery = rng.random() < 0.6
+    address = f"{100 + index % 900} Peachtree St, Atlanta, GA" if delivery else None
+    # Older orders are complete; delivery orders carry coordinates as if already geocoded
+    coords = fake_coords(address) if delivery else None
+    return {
+        "id": str(uuid.uuid4()),
+        "first_name": FIRST_NAMES[index % len(FIRST_NAMES)],
+        "phone_number": f"404555{index % 10000:04d}",
+        "delivery_method": "delivery" if delivery else "pickup",
+        "delivery_address": address,
+        "delivery_coords": list(coords) if coords else None,
+        "referral_name": None,
+        "items": items,
+        "total": round(total, 2),
+        "status": "pending" if index < 300 else "complete",
+        "created_at": (now - age).isoformat(),
+    }
+
+
+async def seed(db, menu_count, inquiry_count, rng):
+    menu_items = [make_menu_item(i, rng) for i in range(menu_count)]
+    now = datetime.now(timezone.utc)
+    await db.menu_items.delete_many({})
+    await db.inquiries.delete_many({})
+    await db.menu_items.insert_many(menu_items)
+    for start in range(0, inquiry_count, 5000):
+        batch = [
+            make_inquiry(i, menu_items, rng, now, seeded_age(i, inquiry_count))
+            for i in range(start, min(start + 5000, inquiry_count))
+        ]
+        await db.inquiries.insert_many(batch)
+    await db.category_order.update_one({}, {"$set": {"order": sorted(CATEGORIES)}}, upsert=True)
+    return menu_items
+
+
+async def asgi_request(app, method, path, query="", body=b"", headers=None):
+    """Send a single request through the ASGI app and return (status, body)."""
+    raw_headers = [(b"host", b"bench")] + [
+        (key.lower().encode(), value.encode()) for key, value in (headers or {}).items()
+    ]
+    if body:
+        raw_headers.append((b"content-length", str(len(body)).encode()))
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": raw_headers,
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+    sent = False
+    response = {"status": None, "body": []}
+    done = asyncio.Event()
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+        elif message["type"] == "http.response.body":
+            response["body"].append(message.get("body", b""))
+            if not message.get("more_body"):
+                done.set()
+
+    await app(scope, receive, send)
+    done.set()
+    return response["status"], b"".join(response["body"])
+
+
+def json_request(method, path, payload=None, query="", auth=False):
+    return SimpleNamespace(method=method, path=path, query=query, auth=auth,
+                           body=json.dumps(payload).encode() if payload is not None else b"",
+                           headers={"content-type": "application/json"} if payload is not None else {})
+
+
+def multipart_request(path, files, auth=True):
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, content in files:
+        parts.append(
+            f"--{boundary}\r\nContent-Disposition: form-data; name=\"files\"; filename=\"{name}\"\r\n"
+            f"Content-Type: image/png\r\n\r\n".encode() + content + b"\r\n"
+        )
+    body = b"".join(parts) + f"--{boundary}--\r\n".encode()
+    return SimpleNamespace(method="POST", path=path, query="", auth=auth, body=body,
+                           headers={"content-type": f"multipart/form-data; boundary={boundary}"})
+
+
+def build_scenarios(menu_items, inquiry_ids, rng):
+    """Each scenario maps a request index to a request; counts are scaled down for heavy routes.
+
+    Also returns, per create route, the list its responses' ids should be
+    appended to; the matching delete route consumes them, so repeated passes
+    never run out of things to delete.
+    """
+    sample_item = menu_items[0]
+    cart = [{
+        "menu_item_id": item["id"],
+        "title": item["title"],
+        "variant_name": item["variants"][0]["name"],
+        "variant_price": item["variants"][0]["price"],
+        "quantity": 2,
+        "discount": item["discount"],
+    } for item in menu_items[:3]]
+    cart_total = round(sum(i["variant_price"] * i["quantity"] * (1 - i["discount"] / 100) for i in cart), 2)
+    menu_payload = {k: v for k, v in sample_item.items() if k not in ("id", "created_at")}
+    status_targets = inquiry_ids[:2000]
+    png = b"\x89PNG\r\n\x1a\n" + bytes(rng.getrandbits(8) for _ in range(32 * 1024))
+
+    def delete_created_request(path, ids):
+        # Delete what the create scenario made when available
+        return lambda i: json_request("DELETE", f"{path}/{ids.pop() if ids else 'missing'}", auth=True)
+
+    created = {"POST /api/admin/menu/items": [], "POST /api/inquiries": []}
+    return [
+        ("GET /api/", 1.0, lambda i: json_request("GET", "/api/")),
+        ("GET /api/menu/items", 0.2, lambda i: json_request("GET", "/api/menu/items")),
+        ("GET /api/menu/items?search", 0.2, lambda i: json_request("GET", "/api/menu/items", query=f"search=blend+{i % 50}")),
+        ("GET /api/menu/items?item_type", 0.2, lambda i: json_request("GET", "/api/menu/items", query="item_type=buds")),
+        ("GET /api/menu/categories", 0.5, lambda i: json_request("GET", "/api/menu/categories")),
+        ("POST /api/validate-delivery", 0.5, lambda i: json_request(
+            "POST", "/api/validate-delivery",
+            {"delivery_address": f"{i} Main St, Atlanta, GA", "cart_total": cart_total, "items": cart})),
+        ("POST /api/inquiries", 1.0, lambda i: json_request("POST", "/api/inquiries", {
+            "first_name": FIRST_NAMES[i % len(FIRST_NAMES)],
+            "phone_number": f"404777{i:04d}",
+            "delivery_method": "delivery",
+            "delivery_address": f"{i} Main St, Atlanta, GA",
+            "referral_name": None,
+            "items": cart,
+            "total": cart_total,
+        })),
+        ("GET /api/inquiries/history", 0.2, lambda i: json_request(
+            "GET", "/api/inquiries/history",
+            query=f"first_name={FIRST_NAMES[i % len(FIRST_NAMES)]}&phone_number=404555{i % 10000:04d}")),
+        ("GET /api/inquiries/history?range", 0.2, lambda i: json_request(
+            "GET", "/api/inquiries/history",
+            query=f"first_name={FIRST_NAMES[i % len(FIRST_NAMES)]}&phone_number=404555{i % 10000:04d}"
+                  f"&start_date={(datetime.now(timezone.utc) - timedelta(days=365)).date()}")),
+        ("POST /api/admin/login", 0.05, lambda i: json_request(
+            "POST", "/api/admin/login", {"email": "admin@purepath.com", "password": "Feelgoodmix"})),
+        ("POST /api/admin/upload-images", 0.2, lambda i: multipart_request(
+            "/api/admin/upload-images", [("a.png", png), ("b.png", png)])),
+        ("POST /api/admin/menu/items", 0.5, lambda i: json_request(
+            "POST", "/api/admin/menu/items", dict(menu_payload, title=f"Bench Item {i}"), auth=True)),
+        ("PUT /api/admin/menu/items/{id}", 0.5, lambda i: json_request(
+            "PUT", f"/api/admin/menu/items/{menu_items[i % len(menu_items)]['id']}",
+            {k: v for k, v in menu_items[i % len(menu_items)].items() if k not in ("id", "created_at")}, auth=True)),
+        ("DELETE /api/admin/menu/items/{id}", 0.5,
+         delete_created_request("/api/admin/menu/items", created["POST /api/admin/menu/items"])),
+        ("PUT /api/admin/menu/reorder", 0.2, lambda i: json_request(
+            "PUT", "/api/admin/menu/reorder",
+            [{"id": item["id"], "display_order": n} for n, item in enumerate(menu_items[:20])], auth=True)),
+        ("PUT /api/admin/categories/order", 0.5, lambda i: json_request(
+            "PUT", "/api/admin/categories/order", {"categories": sorted(CATEGORIES)}, auth=True)),
+        ("PUT /api/admin/categories/{name}/rename", 0.2, lambda i: json_request(
+            "PUT", f"/api/admin/categories/Unused{i}/rename", {"new_name": f"Unused{i + 1}"}, auth=True)),
+        ("DELETE /api/admin/categories/{name}", 0.2, lambda i: json_request(
+            "DELETE", f"/api/admin/categories/Unused{i}", auth=True)),
+        ("GET /api/admin/inquiries", 0.1, lambda i: json_request("GET", "/api/admin/inquiries", auth=True)),
+        ("GET /api/admin/inquiries?range", 0.1, lambda i: json_request(
+            "GET", "/api/admin/inquiries", auth=True,
+            query=f"start_date={(datetime.now(timezone.utc) - timedelta(days=90)).date()}"
+                  f"&end_date={datetime.now(timezone.utc).date()}")),
+        ("GET /api/admin/delivery-routes", 0.1, lambda i: json_request(
+            "GET", "/api/admin/delivery-routes", query=f"drivers={1 + i % 4}", auth=True)),
+        ("PUT /api/admin/inquiries/{id}/status", 0.5, lambda i: json_request(
+            "PUT", f"/api/admin/inquiries/{status_targets[i % len(status_targets)]}/status",
+            query=f"status={'complete' if i % 2 else 'pending'}", auth=True)),
+        # Same weight as POST /api/inquiries, so repeated passes see the same data size
+        ("DELETE /api/admin/inquiries/{id}", 1.0,
+         delete_created_request("/api/admin/inquiries", created["POST /api/inquiries"])),
+        ("GET /api/admin/summary", 1.0, lambda i: json_request("GET", "/api/admin/summary", auth=True)),
+        ("POST /api/admin/summary/reconcile", 0.02, lambda i: json_request(
+            "POST", "/api/admin/summary/reconcile", auth=True)),
+        ("GET /api/admin/admission", 1.0, lambda i: json_request("GET", "/api/admin/admission", auth=True)),
+        ("GET /api/admin/slow-queries", 1.0, lambda i: json_request("GET", "/api/admin/slow-queries", auth=True)),
+    ], created
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def drive(app, make_request, total, concurrency, token, on_response=None):
+    """Send ``total`` requests from ``concurrency`` workers sharing one event loop.
+
+    Latencies include time spent waiting on other in-flight requests, which
+    the in-memory stand-in allows by yielding on every operation.
+    """
+    latencies = []
+    errors = 0
+    counter = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            request = make_request(i)
+            headers = dict(request.headers)
+            if request.auth:
+                headers["authorization"] = f"Bearer {token}"
+            started = time.perf_counter()
+            status, body = await asgi_request(app, request.method, request.path, request.query, request.body, headers)
+            latencies.append((time.perf_counter() - started) * 1000)
+            if status >= 400:
+                errors += 1
+            elif on_response:
+                on_response(body)
+
+    wall_started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - wall_started
+    latencies.sort()
+    return {
+        "requests": total,
+        "errors": errors,
+        "rps": round(total / wall, 1) if wall else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50), 2),
+        "p95_ms": round(percentile(latencies, 0.95), 2),
+        "p99_ms": round(percentile(latencies, 0.99), 2),
+    }
+
+
+def calibrate(rounds=5):
+    """Median milliseconds for a fixed CPU-bound workload.
+
+    Measured next to each route so results can be compared at equal machine
+    speed: shared and virtual machines drift by tens of percent between runs.
+    """
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        sum(i * i for i in range(100_000))
+        timings.append((time.perf_counter() - started) * 1000)
+    return round(statistics.median(timings), 3)
+
+
+def median_result(runs):
+    """Combine repeated runs of one route: the median of each rate and latency,
+    after scaling every run to the runs' median machine speed."""
+    reference = statistics.median(run["calibration_ms"] for run in runs)
+    combined = dict(runs[0], errors=max(run["errors"] for run in runs), calibration_ms=round(reference, 3))
+    combined["rps"] = round(statistics.median(
+        run["rps"] * run["calibration_ms"] / reference for run in runs), 2)
+    for field in ("p50_ms", "p95_ms", "p99_ms"):
+        combined[field] = round(statistics.median(
+            run[field] * reference / run["calibration_ms"] for run in runs), 2)
+    return combined
+
+
+def compare(results, baseline, threshold, noise_floor_ms=0.0, concurrency=1):
+    """Return a list of regressions beyond ``threshold`` (a fraction, e.g. 0.25).
+
+    Changes under ``noise_floor_ms`` are ignored however large in relative
+    terms. For throughput that is the change in time per request, which with
+    ``concurrency`` requests always in flight is ``concurrency / rps``.
+
+    When both sides carry ``calibration_ms``, results are first scaled to the
+    machine speed the baseline was recorded at.
+    """
+    def slower_ms(rps, base_rps):
+        return concurrency * 1000 * (1 / rps - 1 / base_rps) if rps else float("inf")
+
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        speed = 1.0
+        if result.get("calibration_ms") and base.get("calibration_ms"):
+            speed = result["calibration_ms"] / base["calibration_ms"]
+        note = f" (machine {speed:.2f}x slower)" if speed > 1 else ""
+        rps, p95 = result["rps"] * speed, result["p95_ms"] / speed
+        if (base["rps"] and rps < base["rps"] * (1 - threshold)
+                and slower_ms(rps, base["rps"]) > noise_floor_ms):
+            regressions.append(f"{name}: {result['rps']} req/s vs baseline {base['rps']}{note}")
+        if (base["p95_ms"] and p95 > base["p95_ms"] * (1 + threshold)
+                and p95 - base["p95_ms"] > noise_floor_ms):
+            regressions.append(f"{name}: p95 {result['p95_ms']}ms vs baseline {base['p95_ms']}ms{note}")
+    return regressions
+
+
+async def settle(server, timeout=30.0):
+    """Wait for background jobs queued by the last route so they don't skew the next one."""
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if not await server.jobs.collection.count_documents({"status": {"$in": ["queued", "running"]}}):
+            break
+        await asyncio.sleep(0.05)
+    # Stand in for the finished_at TTL index (the in-memory database has none);
+    # otherwise every pass would scan more finished jobs than the last
+    await server.jobs.collection.delete_many({"status": "done"})
+
+
+async def measure(server, selected, created, token, args, runs):
+    """Run ``args.repeat`` passes over ``selected``, appending each route's results to ``runs``.
+
+    Every route runs once per pass, so routes that create and delete data
+    stay in step.
+    """
+    for run in range(1, args.repeat + 1):
+        if args.repeat > 1:
+            print(f"Pass {run}/{args.repeat}")
+        print(f"{'route':45} {'req/s':>9} {'p50':>9} {'p95':>9} {'p99':>9} {'err':>5} {'cpu':>8}")
+        for name, weight, make_request in selected:
+            total = max(args.concurrency, int(args.requests * weight))
+            on_response = None
+            if name in created:
+                on_response = lambda body, ids=created[name]: ids.append(json.loads(body)["id"])
+            if args.warmup:
+                # Fill caches and connection pools before measuring; the warm-up itself is discarded
+                await drive(server.app, make_request, args.warmup, min(args.concurrency, args.warmup), token, on_response)
+            # Don't let garbage left by earlier routes be collected on this one's clock
+            gc.collect()
+            calibration = calibrate()
+            result = await drive(server.app, make_request, total, args.concurrency, token, on_response)
+            result["calibration_ms"] = round(statistics.median([calibration, calibrate()]), 3)
+            runs.setdefault(name, []).append(result)
+            await settle(server)
+            print_result(name, result)
+
+
+def print_result(name, result):
+    print(f"{name:45} {result['rps']:>9} {result['p50_ms']:>8}ms {result['p95_ms']:>8}ms "
+          f"{result['p99_ms']:>8}ms {result['errors']:>5} {result['calibration_ms']:>6}ms")
+
+
+def print_results(title, results):
+    print(f"\n{title}")
+    print(f"{'route':45} {'req/s':>9} {'p50':>9} {'p95':>9} {'p99':>9} {'err':>5} {'cpu':>8}")
+    for name, result in results.items():
+        print_result(name, result)
+
+
+def install_fakes(server, args):
+    """Point the app at the in-memory database and fake geocoder."""
+    FakeNominatim.latency = args.geocode_latency_ms / 1000
+    server.Nominatim = FakeNominatim
+    # The fake has no usage policy to respect; the cache still applies
+    server.geocoder.min_interval = 0
+    if not args.mongo_url:
+        FakeCollection.latency = args.db_latency_ms / 1000
+        server.db = FakeDatabase(os.environ["DB_NAME"])
+        # No replicas in memory: catalog reads share the one fake database
+        server.catalog_db = server.db
+
+
+async def main(args):
+    # Always use a dedicated database: seeding wipes menu_items and inquiries
+    os.environ["MONGO_URL"] = args.mongo_url or "mongodb://localhost:27017"
+    os.environ["DB_NAME"] = args.db_name
+    # Archival runs once, explicitly, below rather than in the background mid-measurement
+    os.environ["ARCHIVE_INTERVAL_SECONDS"] = "0"
+    os.environ["SUMMARY_RECONCILE_SECONDS"] = "0"
+    # Measure raw route throughput unless shedding behaviour is what's under test
+    os.environ["ADMISSION_CONTROL"] = "1" if args.admission else "0"
+    if not args.mongo_url:
+        os.environ["CACHE_BUS"] = "local"  # the in-memory stand-in has no capped collections
+    os.environ.setdefault("JWT_SECRET", "bench-secret")
+    import server
+
+    install_fakes(server, args)
+    menu_count, inquiry_count = PROFILES[args.profile]
+    menu_count = args.menu_items or menu_count
+    inquiry_count = args.inquiries if args.inquiries is not None else inquiry_count
+    rng = random.Random(args.seed)
+
+    print(f"Seeding {menu_count} menu items and {inquiry_count} inquiries...")
+    menu_items = await seed(server.db, menu_count, inquiry_count, rng)
+    await server.app.router.startup()
+    try:
+        return await benchmark(server, args, menu_items, rng)
+    finally:
+        await server.app.router.shutdown()
+
+
+async def benchmark(server, args, menu_items, rng):
+    """Measure the selected routes and compare or record them; returns the exit status."""
+    if not args.no_archive:
+        print(f"Archived {await server.archiver.run_pass()} inquiries")
+    await server.counters.reconcile()
+    # Status updates target hot inquiries; archived ones can't be updated
+    inquiry_ids = [doc["id"] for doc in await server.db.inquiries.find({}, {"_id": 0, "id": 1}).to_list(None)]
+    token = server.create_access_token({"email": "admin@purepath.com", "id": "bench"})
+
+    scenarios, created = build_scenarios(menu_items, inquiry_ids, rng)
+    selected = [s for s in scenarios if not args.route or any(r in s[0] for r in args.route)]
+    runs = {}
+    await measure(server, selected, created, token, args, runs)
+    results = {name: median_result(route_runs) for name, route_runs in runs.items()}
+    if args.repeat > 1:
+        print_results(f"Median of {args.repeat} passes", results)
+
+    baselines = json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists() else {}
+    stored = baselines.setdefault(args.profile, {})
+    if args.update_baseline or args.rebaseline:
+        # Existing entries are only replaced on request, so a change can't
+        # quietly re-record its own regression as the new normal
+        updated = results if args.rebaseline else {k: v for k, v in results.items() if k not in stored}
+        for name, result in sorted(updated.items()):
+            previous = stored.get(name)
+            if previous:
+                print(f"Re-recorded {name}: {previous['rps']} -> {result['rps']} req/s, "
+                      f"p95 {previous['p95_ms']} -> {result['p95_ms']}ms")
+            else:
+                print(f"Recorded new route {name}")
+        stored.update(updated)
+        BASELINE_PATH.write_text(json.dumps(baselines, indent=2, sort_keys=True) + "\n")
+        print(f"Baseline for '{args.profile}' written to {BASELINE_PATH}")
+        if args.rebaseline:
+            return 0
+        results = {k: v for k, v in results.items() if k not in updated}
+    if not stored:
+        print(f"No baseline for profile '{args.profile}'; run with --update-baseline to record one")
+        return 0
+    unrecorded = sorted(name for name in results if name not in stored)
+    if unrecorded:
+        print(f"\nNo baseline yet for {', '.join(unrecorded)}; record with --update-baseline")
+    regressions = compare(results, stored, args.threshold, args.noise_floor_ms, args.concurrency)
+    if regressions:
+        # Confirm before failing: measure the flagged routes (and the create
+        # routes that feed deletes) again and judge the median of every pass
+        flagged = {
+            name for name, result in results.items()
+            if compare({name: result}, stored, args.threshold, args.noise_floor_ms, args.concurrency)
+        }
+        print(f"\n{len(regressions)} possible regression(s); measuring {len(flagged)} route(s) again to confirm")
+        await measure(server, [s for s in selected if s[0] in flagged or s[0] in created], created, token, args, runs)
+        results = {name: median_result(runs[name]) for name in results}
+        print_results("Median of all passes", {name: results[name] for name in flagged})
+        regressions = compare(results, stored, args.threshold, args.noise_floor_ms, args.concurrency)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%} and {args.noise_floor_ms}ms:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    print(f"\nNo regressions beyond {args.threshold:.0%} and {args.noise_floor_ms}ms")
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="small")
+    parser.add_argument("--menu-items", type=int, help="override the profile's menu item count")
+    parser.add_argument("--inquiries", type=int, help="override the profile's inquiry count")
+    parser.add_argument("--requests", type=int, default=500, help="base request count per route")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--route", action="append", help="only run routes containing this text (repeatable)")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed regression fraction")
+    parser.add_argument("--noise-floor-ms", type=float, default=2.0,
+                        help="ignore regressions smaller than this in absolute terms (p95, or time per request for req/s)")
+    parser.add_argument("--repeat", type=int, default=5, help="passes over every route; each route reports its median")
+    parser.add_argument("--warmup", type=int, default=20, help="discarded requests sent to each route before measuring")
+    parser.add_argument("--geocode-latency-ms", type=float, default=0.0, help="simulated geocoder latency")
+    parser.add_argument("--db-latency-ms", type=float, default=0.0,
+                        help="simulated round trip per in-memory database operation")
+    parser.add_argument("--mongo-url", help="use a real local mongod instead of the in-memory stand-in")
+    parser.add_argument("--db-name", default="budbar_bench", help="database to seed (it is wiped first)")
+    parser.add_argument("--admission", action="store_true", help="run with per-route admission control enabled")
+    parser.add_argument("--no-archive", action="store_true", help="keep every seeded inquiry in the hot collection")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="record routes missing from the baseline; existing entries are still compared")
+    parser.add_argument("--rebaseline", action="store_true",
+                        help="overwrite the baseline entries of every route run (narrow with --route)")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(parse_args())))
@@ -110,6 +110,7 @@ function ManageableCategoryItem({ id, name, onDelete, onRename }) {
 export default function AdminDashboard() {
   const [menuItems, setMenuItems] = useState([]);
   const [inquiries, setInquiries] = useState([]);
+  const [summary, setSummary] = useState(null);
   const [isAddDialogOpen, setIsAddDialogOpen] = useState(false);
   const [editingItem, setEditingItem] = useState(null);
   const [menuSearchQuery, setMenuSearchQuery] = useState("");
@@ -194,26 +195,38 @@ export default function AdminDashboard() {
     );
   }, [menuItems, menuSearchQuery]);
 
+  const fetchSummary = useCallback(async () => {
+    try {
+      const response = await axios.get(`${API}/admin/summary`, getAuthHeaders());
+      setSummary(response.data);
+    } catch (error) {
+      console.error("Error fetching summary:", error);
+    }
+  }, []);
+
   // Filtered inquiries using useMemo
-  const filteredInquiries = useMemo(() => {
+  const filterInquiries = useCallback((list) => {
     if (!inquirySearchQuery) {
-      return inquiries;
+      return list;
     }
 
     const query = inquirySearchQuery.toLowerCase();
-    return inquiries.filter(inquiry =>
+    return list.filter(inquiry =>
       inquiry.first_name.toLowerCase().includes(query) ||
       inquiry.phone_number.includes(query) ||
       inquiry.delivery_address?.toLowerCase().includes(query) ||
       inquiry.items.some(item => item.title.toLowerCase().includes(query))
     );
-  }, [inquiries, inquirySearchQuery]);
+  }, [inquirySearchQuery]);
+
+  const filteredInquiries = useMemo(() => filterInquiries(inquiries), [inquiries, filterInquiries]);
 
   useEffect(() => {
     fetchMenuItems();
     fetchCategories();
     fetchInquiries();
-  }, [fetchMenuItems, fetchCategories, fetchInquiries]);
+    fetchSummary();
+  }, [fetchMenuItems, fetchCategories, fetchInquiries, fetchSummary]);
 
   // Auto-save form data to localStorage (excluding images to avoid quota errors)
   useEffect(() => {
@@ -506,6 +519,7 @@ export default function AdminDashboard() {
       });
       toast.success(`Status updated to ${newStatus}`);
       fetchInquiries();
+      fetchSummary();
     } catch (error) {
       console.error("Error updating status:", error);
       toast.error("Failed to update status");
@@ -521,13 +535,14 @@ export default function AdminDashboard() {
       await axios.delete(`${API}/admin/inquiries/${inquiryId}`, getAuthHeaders());
       toast.success("Inquiry deleted successfully");
       fetchInquiries();
+      fetchSummary();
     } catch (error) {
       console.error("Error deleting inquiry:", error);
       toast.error("Failed to delete inquiry");
     }
   };
 
-  const downloadCSV = (useDateRange = false) => {
+  const downloadCSV = async (useDateRange = false) => {
     let inquiriesToExport = filteredInquiries;
 
     // Filter by date range if selected
@@ -539,6 +554,19 @@ export default function AdminDashboard() {
       const endOfDay = new Date(endDate);
       endOfDay.setHours(23, 59, 59, 999);
 
+      // Ranges can reach archived orders, which the dashboard list doesn't load
+      try {
+        const response = await axios.get(`${API}/admin/inquiries`, {
+          ...getAuthHeaders(),
+          params: { start_date: startOfDay.toISOString(), end_date: endOfDay.toISOString() }
+        });
+        inquiriesToExport = filterInquiries(response.data);
+      } catch (error) {
+        console.error("Error fetching inquiries for export:", error);
+        toast.error("Failed to load inquiries for the selected date range");
+        return;
+      }
+
       inquiriesToExport = inquiriesToExport.filter(inquiry => {
         const inquiryDate = new Date(inquiry.created_at);
         return inquiryDate >= startOfDay && inquiryDate <= endOfDay;
@@ -639,6 +667,26 @@ export default function AdminDashboard() {
         <div className="max-w-7xl mx-auto px-4 sm:px-6 lg:px-8 py-4">
           <div className="flex justify-between items-center">
             <h1 className="text-3xl font-bold gold-text">Admin Dashboard</h1>
+            {summary && (
+              <div className="hidden md:flex gap-6 text-sm" data-testid="dashboard-summary">
+                <div>
+                  <p className="text-gray-500">Pending</p>
+                  <p className="font-bold text-lg">{summary.pending}</p>
+                </div>
+                <div>
+                  <p className="text-gray-500">Complete</p>
+                  <p className="font-bold text-lg">{summary.complete}</p>
+                </div>
+                <div>
+                  <p className="text-gray-500">Today</p>
+                  <p className="font-bold text-lg">{summary.today.orders} · ${summary.today.revenue.toFixed(2)}</p>
+                </div>
+                <div>
+                  <p className="text-gray-500">All Time</p>
+                  <p className="font-bold text-lg">{summary.orders} · ${summary.revenue.toFixed(2)}</p>
+                </div>
+              </div>
+            )}
             <Button onClick={handleLogout} variant="outline" data-testid="logout-button">
               <LogOut className="mr-2 h-4 w-4" />
               Logout
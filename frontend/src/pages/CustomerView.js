@@ -333,7 +333,8 @@ export default function CustomerView() {
     try {
       const response = await axios.post(`${API}/validate-delivery`, {
         delivery_address: deliveryAddress,
-        cart_total: calculateTotal()
+        cart_total: calculateTotal(),
+        items: cart
       });
 
       setDeliveryValidation(response.data);
@@ -354,6 +355,37 @@ export default function CustomerView() {
     });
   };
 
+  // Re-price the cart from the current menu, dropping items that are gone
+  const refreshCartPrices = async () => {
+    try {
+      const response = await axios.get(`${API}/menu/items`);
+      const itemsById = Object.fromEntries(response.data.map(item => [item.id, item]));
+      const refreshed = [];
+      const removed = [];
+      cart.forEach(cartItem => {
+        const item = itemsById[cartItem.menu_item_id];
+        const variant = item?.variants?.find(v => v.name === cartItem.variant_name);
+        if (!variant) {
+          removed.push(cartItem.title);
+          return;
+        }
+        refreshed.push({
+          ...cartItem,
+          title: item.title,
+          variant_price: variant.price,
+          discount: item.discount
+        });
+      });
+      setCart(refreshed);
+      if (removed.length > 0) {
+        toast.info(`Removed unavailable items: ${removed.join(", ")}`);
+      }
+      fetchMenuItems();
+    } catch (error) {
+      console.error("Error refreshing cart prices:", error);
+    }
+  };
+
   const submitInquiry = async () => {
     if (!firstName || !phoneNumber) {
       toast.error("Please enter your name and phone number");
@@ -404,7 +436,13 @@ export default function CustomerView() {
       setIsCartOpen(false);
     } catch (error) {
       console.error("Error submitting inquiry:", error);
-      toast.error("Failed to submit inquiry. Please try again.");
+      if (error.response?.status === 400) {
+        // Prices changed since the menu was loaded; update the cart so a retry can succeed
+        toast.error(`${error.response.data?.detail || "Your cart is out of date."} Your cart has been updated with current prices.`);
+        await refreshCartPrices();
+        return;
+      }
+      toast.error(error.response?.data?.detail || "Failed to submit inquiry. Please try again.");
     }
   };
 
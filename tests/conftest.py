@@ -0,0 +1,8 @@
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).parent.parent
+# Backend modules import each other as top-level modules; the benchmarks'
+# in-memory Mongo stand-in doubles as the test database.
+sys.path.insert(0, str(ROOT_DIR / "backend"))
+sys.path.insert(0, str(ROOT_DIR / "benchmarks"))
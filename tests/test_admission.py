@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+
+from admission import AdmissionController, Rejected
+
+
+def make_controller():
+    controller = AdmissionController(global_limit=16, reserved=4)
+    controller.limit("POST", "/api/inquiries", concurrency=8, queue=8, max_wait=1.0, priority="high")
+    controller.limit("POST", "/api/validate-delivery", concurrency=2, queue=4, max_wait=1.0, priority="normal")
+    controller.limit("POST", "/api/admin/login", concurrency=4, queue=4, max_wait=0.2, priority="low")
+    return controller
+
+
+def route(controller, path):
+    return controller.route_for("POST", path)
+
+
+def test_full_route_queue_does_not_block_other_routes():
+    async def scenario():
+        controller = make_controller()
+        validate = route(controller, "/api/validate-delivery")
+        for _ in range(2):
+            await controller.acquire(validate)
+        waiting = asyncio.ensure_future(controller.acquire(validate))
+        await asyncio.sleep(0)
+        assert len(validate.waiters) == 1
+
+        login = route(controller, "/api/admin/login")
+        await asyncio.wait_for(controller.acquire(login), 0.05)
+        assert login.active == 1
+
+        controller.release(validate, 0.01)
+        await waiting
+        assert validate.active == 2
+    asyncio.run(scenario())
+
+
+def test_waiter_that_could_run_is_not_overtaken():
+    async def scenario():
+        controller = make_controller()
+        login = route(controller, "/api/admin/login")
+        # Fill the global headroom available to the low tier (16 - 2 * 4 = 8)
+        inquiries = route(controller, "/api/inquiries")
+        for _ in range(8):
+            await controller.acquire(inquiries)
+        waiting = asyncio.ensure_future(controller.acquire(login))
+        await asyncio.sleep(0)
+        assert len(login.waiters) == 1
+
+        controller.release(inquiries, 0.01)
+        await waiting
+        assert login.active == 1 and not login.waiters
+    asyncio.run(scenario())
+
+
+def test_rejects_when_queue_is_full():
+    async def scenario():
+        controller = make_controller()
+        validate = route(controller, "/api/validate-delivery")
+        for _ in range(2):
+            await controller.acquire(validate)
+        waiters = [asyncio.ensure_future(controller.acquire(validate)) for _ in range(4)]
+        await asyncio.sleep(0)
+        with pytest.raises(Rejected) as excinfo:
+            await controller.acquire(validate)
+        assert excinfo.value.retry_after >= 1
+        assert validate.rejected == 1
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        assert not validate.waiters and validate.active == 2
+    asyncio.run(scenario())
+
+
+def test_low_priority_is_held_out_of_reserved_headroom():
+    async def scenario():
+        controller = make_controller()
+        inquiries = route(controller, "/api/inquiries")
+        validate = route(controller, "/api/validate-delivery")
+        for _ in range(8):
+            await controller.acquire(inquiries)
+        # Normal priority may use up to 16 - 4 = 12 slots overall, low only 8
+        await controller.acquire(validate)
+        await controller.acquire(validate)
+        with pytest.raises(Rejected):
+            await controller.acquire(route(controller, "/api/admin/login"))
+        assert controller.active == 10
+    asyncio.run(scenario())
@@ -0,0 +1,82 @@
+import asyncio
+from datetime import datetime, timezone, timedelta
+
+import pytest
+
+from archive import InquiryArchiver, parse_date_range, partition_name, partitions_between
+from fake_mongo import FakeDatabase
+
+
+def test_no_bounds():
+    assert parse_date_range(None, None) is None
+
+
+def test_bare_end_date_includes_whole_day():
+    start, end = parse_date_range("2024-01-01", "2024-01-31")
+    assert start == datetime(2024, 1, 1, tzinfo=timezone.utc)
+    assert end == datetime(2024, 2, 1, tzinfo=timezone.utc)
+
+
+def test_open_ended_range():
+    start, end = parse_date_range("2024-01-01", None)
+    assert end > datetime.now(timezone.utc)
+
+
+@pytest.mark.parametrize("start_date,end_date", [("2024-02-01", "2024-01-01"), ("not-a-date", None)])
+def test_invalid_ranges(start_date, end_date):
+    with pytest.raises(ValueError):
+        parse_date_range(start_date, end_date)
+
+
+def test_partitions_between_crosses_year():
+    start = datetime(2023, 11, 15, tzinfo=timezone.utc)
+    end = datetime(2024, 2, 1, tzinfo=timezone.utc)
+    assert partitions_between(start, end) == [
+        "inquiries_archive_2023_11", "inquiries_archive_2023_12",
+        "inquiries_archive_2024_01", "inquiries_archive_2024_02",
+    ]
+
+
+def test_offsets_are_normalized_to_utc():
+    start, end = parse_date_range("2024-03-01T20:00:00-05:00", "2024-03-02T20:00:00-05:00")
+    assert start.isoformat() == "2024-03-02T01:00:00+00:00"
+    assert end.isoformat() == "2024-03-03T01:00:00+00:00"
+
+
+def test_find_prefers_hot_copy_mid_move():
+    async def scenario():
+        archiver = InquiryArchiver(archive_after_days=30)
+        archiver.bind(FakeDatabase("test"))
+        created_at = (datetime.now(timezone.utc) - timedelta(days=60)).isoformat()
+        # Copied to the archive, then set back to pending before the hot delete
+        await archiver.db.inquiries.insert_one({"id": "a", "status": "pending", "created_at": created_at})
+        await archiver.db[partition_name(created_at)].insert_one({"id": "a", "status": "complete", "created_at": created_at})
+        [doc] = await archiver.find({}, parse_date_range("2000-01-01", None))
+        assert doc["status"] == "pending"
+    asyncio.run(scenario())
+
+
+def test_recent_reads_partitions_only_while_needed():
+    async def scenario():
+        archiver = InquiryArchiver(archive_after_days=30)
+        archiver.bind(FakeDatabase("test"))
+        now = datetime.now(timezone.utc)
+        hot = (now - timedelta(days=1)).isoformat()
+        archived = "2024-03-10T12:00:00+00:00"
+        await archiver.db.inquiries.insert_one({"id": "hot", "phone_number": "1", "created_at": hot})
+        await archiver.db[partition_name(archived)].insert_many([
+            {"id": "march", "phone_number": "1", "created_at": archived},
+            {"id": "other", "phone_number": "2", "created_at": archived},
+        ])
+        await archiver.db.inquiries_archive_2024_01.insert_one({"id": "january", "phone_number": "1", "created_at": "2024-01-05T00:00:00+00:00"})
+
+        docs = await archiver.recent({"phone_number": "1"}, limit=5)
+        assert [doc["id"] for doc in docs] == ["hot", "march", "january"]
+
+        # Two matches are found before January, so that partition isn't read
+        def unexpected(*args, **kwargs):
+            raise AssertionError("read a partition that can't contribute")
+        archiver.db.inquiries_archive_2024_01.find = unexpected
+        docs = await archiver.recent({"phone_number": "1"}, limit=2)
+        assert [doc["id"] for doc in docs] == ["hot", "march"]
+    asyncio.run(scenario())
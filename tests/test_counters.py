@@ -0,0 +1,54 @@
+import asyncio
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+
+from counters import InquiryCounters, day_key
+from fake_mongo import FakeDatabase
+
+ATLANTA = ZoneInfo("America/New_York")
+
+
+def make_counters(db, **kwargs):
+    counters = InquiryCounters(**kwargs)
+    counters.bind(db)
+    return counters
+
+
+def test_evening_orders_count_toward_local_day():
+    # 9pm in Atlanta is already the next day in UTC
+    assert day_key("2024-06-11T01:00:00+00:00", ATLANTA) == "day:2024-06-10"
+    assert day_key(datetime(2024, 6, 11, 5, tzinfo=timezone.utc), ATLANTA) == "day:2024-06-11"
+
+
+def test_reconcile_matches_incremental_counters():
+    async def scenario():
+        db = FakeDatabase("test")
+        counters = make_counters(db)
+        docs = [
+            {"id": "a", "status": "pending", "total": 10.0, "created_at": "2024-06-11T01:00:00+00:00"},
+            {"id": "b", "status": "complete", "total": 5.5, "created_at": "2024-06-10T15:00:00+00:00"},
+        ]
+        for doc in docs:
+            await db.inquiries.insert_one(doc)
+            await counters.inquiry_created(doc)
+        incremental = await db.inquiry_counters.find({}, {"_id": 1, "orders": 1}).to_list(None)
+
+        await counters.reconcile()
+        day = await db.inquiry_counters.find_one({"_id": "day:2024-06-10"})
+        assert day["orders"] == 2 and day["revenue"] == 15.5
+        assert await db.inquiry_counters.find({}, {"_id": 1, "orders": 1}).to_list(None) == incremental
+    asyncio.run(scenario())
+
+
+def test_only_one_worker_holds_the_reconcile_lease():
+    async def scenario():
+        db = FakeDatabase("test")
+        first, second = make_counters(db), make_counters(db)
+        assert await first._acquire_lease() is True
+        assert await second._acquire_lease() is False
+        assert await first._acquire_lease() is True  # renewal
+        await db.inquiry_counters.update_one(
+            {"_id": "lease:reconcile"}, {"$set": {"expires_at": datetime(2000, 1, 1, tzinfo=timezone.utc)}}
+        )
+        assert await second._acquire_lease() is True
+    asyncio.run(scenario())
@@ -0,0 +1,62 @@
+from types import SimpleNamespace
+
+import pytest
+from pymongo.read_preferences import Primary, SecondaryPreferred
+
+from data_access import PoolMetrics, catalog_read_preference
+
+ADDRESS = ("db1", 27017)
+
+
+def test_catalog_read_preference_defaults_to_bounded_secondary_reads():
+    preference = catalog_read_preference({})
+    assert isinstance(preference, SecondaryPreferred)
+    assert preference.max_staleness == 90
+
+
+def test_catalog_read_preference_primary_ignores_staleness():
+    env = {"MONGO_CATALOG_READ_PREFERENCE": "primary", "MONGO_CATALOG_MAX_STALENESS_SECONDS": "10"}
+    assert isinstance(catalog_read_preference(env), Primary)
+
+
+def test_catalog_read_preference_allows_unbounded_staleness():
+    assert catalog_read_preference({"MONGO_CATALOG_MAX_STALENESS_SECONDS": "-1"}).max_staleness == -1
+
+
+@pytest.mark.parametrize("env", [
+    {"MONGO_CATALOG_READ_PREFERENCE": "secondaryOnly"},
+    {"MONGO_CATALOG_MAX_STALENESS_SECONDS": "89"},
+    {"MONGO_CATALOG_MAX_STALENESS_SECONDS": "0"},
+])
+def test_catalog_read_preference_rejects_invalid_settings(env):
+    with pytest.raises(ValueError):
+        catalog_read_preference(env)
+
+
+def test_pool_metrics_tracks_waits_and_connections_in_use(monkeypatch):
+    clock = iter([0.0, 0.002, 1.0, 1.010, 2.0, 2.5])
+    monkeypatch.setattr("data_access.time", SimpleNamespace(perf_counter=lambda: next(clock)))
+    metrics = PoolMetrics()
+    event = SimpleNamespace(address=ADDRESS)
+    metrics.connection_created(event)
+    metrics.connection_created(event)
+    for _ in range(2):
+        metrics.connection_check_out_started(event)
+        metrics.connection_checked_out(event)
+    metrics.connection_check_out_started(event)
+    metrics.connection_check_out_failed(SimpleNamespace(address=ADDRESS, reason="timeout"))
+    metrics.connection_checked_in(event)
+
+    snapshot = metrics.snapshot()
+    assert snapshot["checkouts"] == 2
+    assert snapshot["failed_checkouts"] == {"timeout": 1}
+    assert snapshot["pools"] == {"db1:27017": {"open": 2, "in_use": 1, "cleared": 0}}
+    # The failed checkout's wait is not counted as a checkout wait
+    assert snapshot["wait_ms"]["avg"] == pytest.approx(6.0)
+    assert snapshot["wait_ms"]["max"] == pytest.approx(10.0)
+
+
+def test_pool_metrics_checkout_without_start_counts_no_wait():
+    metrics = PoolMetrics()
+    metrics.connection_checked_out(SimpleNamespace(address=ADDRESS))
+    assert metrics.snapshot()["wait_ms"]["max"] == 0.0
@@ -0,0 +1,44 @@
+import asyncio
+import time
+
+from fake_mongo import FakeDatabase
+from geocoding import Geocoder, normalize_address
+
+
+def make_geocoder(db, calls, **kwargs):
+    def lookup(address):
+        calls.append((address, time.monotonic()))
+        return None if "nowhere" in address.lower() else (33.7, -84.4)
+    geocoder = Geocoder(lookup, **kwargs)
+    geocoder.bind(db)
+    return geocoder
+
+
+def test_normalize_address():
+    assert normalize_address("  12 Main St,\n Atlanta ") == "12 main st, atlanta"
+
+
+def test_results_are_cached_per_normalized_address():
+    async def scenario():
+        calls = []
+        geocoder = make_geocoder(FakeDatabase("test"), calls, min_interval=0)
+        assert await geocoder.geocode("12 Main St") == (33.7, -84.4)
+        assert await geocoder.geocode("12  MAIN st ") == (33.7, -84.4)
+        assert await geocoder.geocode("Nowhere") is None
+        assert await geocoder.geocode("nowhere") is None
+        assert [address for address, _ in calls] == ["12 Main St", "Nowhere"]
+    asyncio.run(scenario())
+
+
+def test_lookups_are_spaced_across_instances():
+    async def scenario():
+        db = FakeDatabase("test")
+        calls = []
+        # Two processes sharing one database share one rate limit
+        first = make_geocoder(db, calls, min_interval=0.1)
+        second = make_geocoder(db, calls, min_interval=0.1)
+        await asyncio.gather(first.geocode("1 A St"), second.geocode("2 B St"), first.geocode("3 C St"))
+        times = sorted(at for _, at in calls)
+        assert len(times) == 3
+        assert all(later - earlier >= 0.09 for earlier, later in zip(times, times[1:]))
+    asyncio.run(scenario())
@@ -0,0 +1,78 @@
+import asyncio
+import os
+import uuid
+from multiprocessing import shared_memory
+
+from invalidation import InvalidationBus, LocalInvalidationBus
+
+
+class RecordingBus(InvalidationBus):
+    async def publish(self, scope):
+        pass
+
+    async def start(self):
+        pass
+
+
+def record(bus):
+    seen = []
+
+    @bus.subscribe
+    async def on_change(event):
+        seen.append(event["version"])
+    return seen
+
+
+async def drain():
+    for _ in range(3):
+        await asyncio.sleep(0)
+
+
+def test_observe_skips_own_consecutive_changes_only():
+    async def scenario():
+        bus = RecordingBus()
+        seen = record(bus)
+        bus._observe(1, {"version": 1}, own=True)
+        await drain()
+        assert seen == [] and bus.version == 1
+        # Another worker published version 2 before this one published 3
+        bus._observe(3, {"version": 3}, own=True)
+        await drain()
+        assert seen == [3]
+        bus._observe(4, {"version": 4})
+        bus._observe(4, {"version": 4})
+        bus._observe(2, {"version": 2})
+        await drain()
+        assert seen == [3, 4] and bus.version == 4
+    asyncio.run(scenario())
+
+
+def test_local_buses_converge():
+    async def scenario():
+        name = f"test_bus_{uuid.uuid4().hex[:8]}"
+        first = LocalInvalidationBus(name, poll_interval=0.001)
+        second = LocalInvalidationBus(name, poll_interval=0.001)
+        first_seen, second_seen = record(first), record(second)
+        await first.start()
+        await second.start()
+        try:
+            async def converged(version):
+                for _ in range(200):
+                    if first.version == second.version == version:
+                        return True
+                    await asyncio.sleep(0.005)
+                return False
+
+            assert await first.publish("catalog") == 1
+            assert await converged(1)
+            assert await second.publish("catalog") == 2
+            assert await converged(2)
+            await drain()
+            # Each worker only reacts to the other's change
+            assert first_seen == [2] and second_seen == [1]
+        finally:
+            await first.stop()
+            await second.stop()
+            shared_memory.SharedMemory(name=name).unlink()
+            os.remove(first.lock_path)
+    asyncio.run(scenario())
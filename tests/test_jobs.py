@@ -0,0 +1,115 @@
+import asyncio
+from datetime import datetime, timezone
+
+from fake_mongo import FakeDatabase
+from jobs import JobQueue
+
+
+def make_queue(**kwargs):
+    queue = JobQueue(**kwargs)
+    queue.bind(FakeDatabase("test"))
+    return queue
+
+
+async def make_due(queue):
+    await queue.collection.update_many({}, {"$set": {"run_at": datetime(2000, 1, 1, tzinfo=timezone.utc)}})
+
+
+def test_enqueue_is_idempotent():
+    async def scenario():
+        queue = make_queue()
+        first = await queue.enqueue("t", {}, idempotency_key="k")
+        second = await queue.enqueue("t", {}, idempotency_key="k")
+        assert first == second
+        assert await queue.collection.count_documents({}) == 1
+    asyncio.run(scenario())
+
+
+def test_run_once_marks_done():
+    async def scenario():
+        queue = make_queue()
+        seen = []
+
+        @queue.handler("t")
+        async def handle(payload):
+            seen.append(payload)
+
+        await queue.enqueue("t", {"n": 1})
+        assert await queue.run_once("w") is True
+        assert seen == [{"n": 1}]
+        assert (await queue.collection.find_one({}))["status"] == "done"
+        assert await queue.run_once("w") is False
+    asyncio.run(scenario())
+
+
+def test_failures_back_off_then_fail_permanently():
+    async def scenario():
+        queue = make_queue(max_attempts=3, backoff_base=10)
+
+        @queue.handler("t")
+        async def handle(payload):
+            raise RuntimeError("boom")
+
+        await queue.enqueue("t", {})
+        before = datetime.now(timezone.utc)
+        await queue.run_once("w")
+        job = await queue.collection.find_one({})
+        assert job["status"] == "queued" and job["attempts"] == 1
+        assert job["last_error"] == "boom"
+        # First retry waits between half and all of backoff_base
+        assert 4.9 <= (job["run_at"] - before).total_seconds() <= 10.1
+        assert await queue.run_once("w") is False
+
+        for _ in range(2):
+            await make_due(queue)
+            await queue.run_once("w")
+        job = await queue.collection.find_one({})
+        assert job["status"] == "failed" and job["attempts"] == 3
+    asyncio.run(scenario())
+
+
+def test_backoff_is_capped():
+    queue = JobQueue(backoff_base=2, backoff_max=30)
+    assert all(15 <= queue.backoff(10) <= 30 for _ in range(20))
+
+
+def test_unknown_job_type_fails_immediately():
+    async def scenario():
+        queue = make_queue()
+        await queue.enqueue("nobody", {})
+        await queue.run_once("w")
+        job = await queue.collection.find_one({})
+        assert job["status"] == "failed" and "No handler" in job["last_error"]
+    asyncio.run(scenario())
+
+
+def test_enqueue_many_skips_existing_keys():
+    async def scenario():
+        queue = make_queue()
+        existing = await queue.enqueue("t", {"n": 0}, idempotency_key="k0")
+        created = await queue.enqueue_many("t", [({"n": n}, f"k{n}") for n in range(3)])
+        assert created == 2
+        assert await queue.collection.count_documents({}) == 3
+        assert (await queue.collection.find_one({"idempotency_key": "k0"}))["id"] == existing
+        assert await queue.enqueue_many("t", []) == 0
+    asyncio.run(scenario())
+
+
+def test_enqueue_many_requeues_old_failures():
+    async def scenario():
+        queue = make_queue()
+        for key in ("old", "recent"):
+            await queue.enqueue("nobody", {}, idempotency_key=key)
+            await queue.run_once("w")
+        await queue.collection.update_one(
+            {"idempotency_key": "old"},
+            {"$set": {"finished_at": datetime(2000, 1, 1, tzinfo=timezone.utc)}}
+        )
+        jobs = [({}, "old"), ({}, "recent"), ({}, "new")]
+        assert await queue.enqueue_many("nobody", jobs) == 1
+        assert await queue.enqueue_many("nobody", jobs, requeue_failed_after=900) == 1
+        old = await queue.collection.find_one({"idempotency_key": "old"})
+        assert old["status"] == "queued" and old["attempts"] == 0 and "finished_at" not in old
+        recent = await queue.collection.find_one({"idempotency_key": "recent"})
+        assert recent["status"] == "failed"
+    asyncio.run(scenario())
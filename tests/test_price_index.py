@@ -0,0 +1,81 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from fake_mongo import FakeDatabase
+from price_index import FLIGHT_PASS_FEE, PriceIndex, PriceMismatch
+
+
+def cart_item(item_id="a", variant="3.5g", price=40.0, quantity=1, discount=0.0, title="Golden"):
+    return SimpleNamespace(
+        menu_item_id=item_id, title=title, variant_name=variant,
+        variant_price=price, quantity=quantity, discount=discount,
+    )
+
+
+@pytest.fixture
+def index():
+    index = PriceIndex()
+    index.update_item("a", [{"name": "3.5g", "price": 40.0}, {"name": "7g", "price": 75.0}], 0)
+    index.update_item("b", [{"name": "1g", "price": 12.5}], 20)
+    return index
+
+
+def test_price_cart_applies_quantity_and_discount(index):
+    items = [cart_item(quantity=2), cart_item("b", "1g", 12.5, quantity=4, discount=20)]
+    assert index.price_cart(items) == 120.0
+
+
+def test_check_total_accepts_flight_pass_fee(index):
+    items = [cart_item()]
+    assert index.check_total(items, 40.0) == 40.0
+    assert index.check_total(items, 40.0 + FLIGHT_PASS_FEE) == 40.0
+
+
+def test_check_total_within_tolerance(index):
+    assert index.check_total([cart_item()], 40.005) == 40.0
+
+
+def test_check_total_rejects_wrong_total(index):
+    with pytest.raises(PriceMismatch):
+        index.check_total([cart_item()], 39.0)
+    with pytest.raises(PriceMismatch):
+        index.check_total([cart_item()], 40.0 + FLIGHT_PASS_FEE / 2)
+
+
+@pytest.mark.parametrize("item", [
+    cart_item(price=35.0),
+    cart_item("b", "1g", 12.5, discount=0),
+    cart_item(variant="28g"),
+    cart_item("gone"),
+    cart_item(quantity=0),
+])
+def test_price_cart_rejects_stale_or_unknown_items(index, item):
+    with pytest.raises(PriceMismatch):
+        index.price_cart([item])
+
+
+def test_missing_and_remove_item(index):
+    assert index.missing([cart_item(), cart_item("c")]) == {"c"}
+    index.remove_item("a")
+    assert index.missing([cart_item()]) == {"a"}
+
+
+def test_ids_not_found_are_not_looked_up_again():
+    async def scenario():
+        db = FakeDatabase("test")
+        await db.menu_items.insert_one({"id": "new", "variants": [{"name": "1g", "price": 10.0}], "discount": 0})
+        index = PriceIndex()
+        await index.rebuild(FakeDatabase("empty"))
+        items = [cart_item("new", "1g", 10.0), cart_item("bogus")]
+        await index.refresh_items(db, index.missing(items))
+        assert index.missing(items) == set()
+        assert index.price_cart([items[0]]) == 10.0
+        with pytest.raises(PriceMismatch):
+            index.price_cart([items[1]])
+
+        # Creating the item in this worker, or a rebuild, forgets the miss
+        index.update_item("bogus", [{"name": "3.5g", "price": 40.0}], 0)
+        assert index.price_cart([items[1]]) == 40.0
+    asyncio.run(scenario())
@@ -0,0 +1,74 @@
+from types import SimpleNamespace
+
+from query_profiler import SlowQueryProfiler, shape_of, suggest_index
+
+COLLSCAN = {"queryPlanner": {"winningPlan": {"stage": "COLLSCAN"}}}
+IXSCAN = {"queryPlanner": {"winningPlan": {"stage": "FETCH", "inputStage": {"stage": "IXSCAN"}}}}
+
+
+def test_shape_of_strips_literals():
+    query = {"phone_number": "555", "created_at": {"$gte": "2024"}, "status": {"$in": ["a", "b"]}}
+    assert shape_of(query) == {"phone_number": "?", "created_at": {"$gte": "?"}, "status": {"$in": ["?"]}}
+
+
+def test_shape_of_keeps_nested_clauses():
+    query = {"$or": [{"title": {"$regex": "x"}}, {"description": "y"}]}
+    assert shape_of(query) == {"$or": [{"title": {"$regex": "?"}}, {"description": "?"}]}
+
+
+def test_suggest_index_equality_sort_range():
+    filter_shape = {"created_at": {"$gte": "?"}, "status": "?"}
+    suggestion = suggest_index(filter_shape, {"total": -1}, COLLSCAN)
+    assert suggestion["keys"] == [["status", 1], ["total", -1], ["created_at", 1]]
+    assert suggestion["reason"] == ["COLLSCAN"]
+
+
+def test_suggest_index_notes_regex():
+    suggestion = suggest_index({"category": "?", "title": {"$regex": "?"}}, {}, COLLSCAN)
+    assert suggestion["keys"] == [["category", 1]]
+    assert "title" in suggestion["note"]
+
+
+def test_no_suggestion_when_indexed():
+    assert suggest_index({"status": "?"}, {}, IXSCAN) is None
+
+
+def event(request_id, name, command, duration_ms=0.0, reply=None):
+    return SimpleNamespace(
+        request_id=request_id, command_name=name, command=command,
+        duration_micros=int(duration_ms * 1000), reply=reply or {},
+    )
+
+
+def open_cursor(profiler, duration_ms, cursor_id=7):
+    profiler.started(event(1, "find", {"find": "menu_items", "filter": {"category": "x"}}))
+    profiler.succeeded(event(1, "find", {}, duration_ms, {"cursor": {"id": cursor_id, "firstBatch": [{}] * 101}}))
+
+
+def test_kill_cursors_forgets_open_cursor():
+    profiler = SlowQueryProfiler(threshold_ms=50)
+    open_cursor(profiler, 5)
+    assert 7 in profiler._cursors
+    profiler.started(event(2, "killCursors", {"killCursors": "menu_items", "cursors": [7]}))
+    assert profiler._cursors == {}
+
+
+def test_slow_get_more_is_recorded_under_its_query():
+    profiler = SlowQueryProfiler(threshold_ms=50)
+    open_cursor(profiler, 5)
+    assert profiler.shapes == {}
+    profiler.started(event(2, "getMore", {"getMore": 7, "collection": "menu_items"}))
+    profiler.succeeded(event(2, "getMore", {}, 80, {"cursor": {"id": 0, "nextBatch": [{}] * 50}}))
+    [entry] = profiler.summary()
+    assert entry["shape"].startswith("menu_items.find")
+    assert entry["docs_returned"] == 50
+    assert profiler._cursors == {}
+
+
+def test_slow_insert_is_recorded():
+    profiler = SlowQueryProfiler(threshold_ms=50)
+    profiler.started(event(1, "insert", {"insert": "inquiries", "documents": [{}]}))
+    profiler.succeeded(event(1, "insert", {}, 120, {"n": 1}))
+    [entry] = profiler.summary()
+    assert entry["shape"].startswith("inquiries.insert")
+    assert entry["suggested_index"] is None
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from route_planner import haversine_matrix, plan_routes
+
+DEPOT = (33.6130, -84.4740)
+
+
+def line_of_stops(count):
+    return [(f"s{n}", (DEPOT[0] + 0.01 * n, DEPOT[1])) for n in range(1, count + 1)]
+
+
+def test_no_stops():
+    assert plan_routes(DEPOT, []) == []
+
+
+def test_single_driver_visits_every_stop_once():
+    stops = line_of_stops(8)
+    [route] = plan_routes(DEPOT, list(reversed(stops)))
+    assert sorted(route["stops"]) == sorted(key for key, _ in stops)
+    # Stops along a line are visited in order, out and back
+    assert route["stops"] in ([key for key, _ in stops], [key for key, _ in reversed(stops)])
+    assert route["distance_miles"] == pytest.approx(sum(route["leg_miles"]) + route["return_miles"], abs=0.05)
+
+
+def test_max_stops_adds_drivers():
+    stops = line_of_stops(10)
+    routes = plan_routes(DEPOT, stops, drivers=1, max_stops=4)
+    assert len(routes) == 3
+    assert sorted(key for route in routes for key in route["stops"]) == sorted(key for key, _ in stops)
+
+
+def test_haversine_matrix_is_symmetric_miles():
+    dist = haversine_matrix(np.array([DEPOT, (33.7490, -84.3880)]))
+    assert dist[0, 0] == 0
+    assert dist[0, 1] == dist[1, 0]
+    assert 10 < dist[0, 1] < 12